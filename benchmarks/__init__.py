@@ -0,0 +1 @@
+"""Стенд и нагрузочные тесты бота."""
@@ -0,0 +1,136 @@
+"""Сравнение разбора ответов API в потоках и в пуле процессов.
+
+Запуск: python -m benchmarks.cpu_pool --workers 4 --sizes 1 10 100 1000
+Для каждого размера истории работ отчёт содержит размер ответа,
+число разобранных ответов в секунду и наибольшее опоздание потока,
+изображающего цикл событий. crossover_bytes - наименьший размер
+ответа, с которого пул процессов разбирает быстрее потоков.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from offload import BatchExecutor
+from records import decode_payload
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+def parse_args(argv=None):
+    """Функция разбирает параметры сравнения."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1, 10, 100, 1000, 5000],
+                        help='работ в одном ответе')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='ответов на каждый размер')
+    parser.add_argument('--threads', type=int, default=32,
+                        help='потоки запросов, как в пуле цикла опроса')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--batch-delay', type=float, default=0.002)
+    return parser.parse_args(argv)
+
+
+def make_body(size):
+    """Функция строит тело ответа API с size работами."""
+    return json.dumps({
+        'homeworks': [
+            {
+                'id': number,
+                'status': STATUSES[number % len(STATUSES)],
+                'homework_name': f'student__hw{number:05d}.zip',
+                'date_updated': '2022-02-13T14:40:57Z',
+                'lesson_name': 'Итоговый проект',
+                'reviewer_comment': 'Замечания к работе. ' * 5,
+            }
+            for number in range(size)
+        ],
+        'current_date': 1000198000,
+    }, ensure_ascii=False).encode('utf-8')
+
+
+class LagProbe(threading.Thread):
+    """Поток, который засыпает на interval и копит опоздания."""
+
+    def __init__(self, interval=0.001):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.max_lag = 0.0
+        self._stopped = threading.Event()
+
+    def run(self):
+        """Цикл измерения опозданий."""
+        while not self._stopped.is_set():
+            started = time.perf_counter()
+            time.sleep(self.interval)
+            lag = time.perf_counter() - started - self.interval
+            self.max_lag = max(self.max_lag, lag)
+
+    def stop(self):
+        """Метод останавливает измерение."""
+        self._stopped.set()
+        self.join()
+
+
+def measure(decode, body, requests, threads):
+    """Функция разбирает body requests раз в threads потоках.
+    Возвращает ответов в секунду и наибольшее опоздание потока, мс.
+    """
+    probe = LagProbe()
+    probe.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(lambda _: decode(body), range(requests)))
+    elapsed = time.perf_counter() - started
+    probe.stop()
+    return round(requests / elapsed, 1), round(probe.max_lag * 1000, 2)
+
+
+def run(args):
+    """Функция выполняет сравнение и возвращает отчёт."""
+    pool = BatchExecutor(args.workers, args.batch_size, args.batch_delay)
+    pool.submit(decode_payload, make_body(1), STATUSES).result()
+    rows = []
+    try:
+        for size in args.sizes:
+            body = make_body(size)
+            thread_rps, thread_lag = measure(
+                lambda body: decode_payload(body, STATUSES),
+                body, args.requests, args.threads
+            )
+            pool_rps, pool_lag = measure(
+                lambda body: pool.submit(
+                    decode_payload, body, STATUSES
+                ).result(),
+                body, args.requests, args.threads
+            )
+            rows.append(dict(
+                homeworks=size, bytes=len(body),
+                thread_rps=thread_rps, pool_rps=pool_rps,
+                thread_lag_ms=thread_lag, pool_lag_ms=pool_lag,
+            ))
+    finally:
+        pool.shutdown()
+    faster = [row['bytes'] for row in rows
+              if row['pool_rps'] > row['thread_rps']]
+    return dict(
+        workers=args.workers,
+        threads=args.threads,
+        crossover_bytes=min(faster) if faster else None,
+        sizes=rows,
+    )
+
+
+def main(argv=None):
+    """Функция запуска сравнения."""
+    print(json.dumps(run(parse_args(argv)), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""Локальная замена API Практикум.Домашка и Telegram Bot API.
+
+Запуск: python -m benchmarks.fake_api --port 8080 --latency 0.05
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HOMEWORKS_PATH = '/api/user_api/homework_statuses/'
+STATS_PATH = '/stats'
+SEND_MESSAGE = re.compile(r'^/bot(?P<token>[^/]+)/sendMessage$')
+HOMEWORK_NAME = re.compile(r'"([^"]+)"')
+VERDICTS = ('approved', 'rejected')
+
+
+def percentile(values, share):
+    """Функция возвращает перцентиль share из списка значений."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(int(round(share * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class FakeWorld:
+    """Состояние стенда: работы студентов и доставленные уведомления.
+    При каждом опросе работа студента с вероятностью churn меняет
+    статус. Время смены статуса запоминается, чтобы по приходу
+    сообщения в Telegram вычислить задержку уведомления.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, throttle_rate=0.0,
+                 churn=0.1, homeworks_per_token=3, retry_after=1):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.churn = churn
+        self.homeworks_per_token = homeworks_per_token
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._homeworks = {}
+        self._changed_at = {}
+        self.polls = 0
+        self.errors = 0
+        self.throttled = 0
+        self.messages = 0
+        self.latencies = []
+
+    def _token_homeworks(self, token):
+        if token not in self._homeworks:
+            self._homeworks[token] = [
+                dict(
+                    id=number,
+                    homework_name=f'{token}-{number}',
+                    status='reviewing',
+                    date_updated=0,
+                    lesson_name='Нагрузочный тест',
+                )
+                for number in range(self.homeworks_per_token)
+            ]
+        return self._homeworks[token]
+
+    def poll(self, token, from_date):
+        """Метод формирует ответ API для токена и from_date."""
+        now = int(time.time())
+        with self._lock:
+            self.polls += 1
+            homeworks = self._token_homeworks(token)
+            if random.random() < self.churn:
+                homework = random.choice(homeworks)
+                homework['status'] = (
+                    'reviewing' if homework['status'] in VERDICTS
+                    else random.choice(VERDICTS)
+                )
+                homework['date_updated'] = now
+                self._changed_at[homework['homework_name']] = time.time()
+            changed = [
+                dict(
+                    homework,
+                    date_updated=time.strftime(
+                        '%Y-%m-%dT%H:%M:%SZ',
+                        time.gmtime(homework['date_updated'])
+                    ),
+                )
+                for homework in homeworks
+                if homework['date_updated'] >= from_date
+            ]
+        return dict(homeworks=changed, current_date=now)
+
+    def deliver(self, text):
+        """Метод учитывает сообщение и задержку уведомлений в нём."""
+        received = time.time()
+        with self._lock:
+            self.messages += 1
+            for name in HOMEWORK_NAME.findall(text):
+                changed_at = self._changed_at.pop(name, None)
+                if changed_at is not None:
+                    self.latencies.append(received - changed_at)
+
+    def roll(self):
+        """Метод выбирает исход запроса: ошибка, 429 или успех."""
+        chance = random.random()
+        if chance < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            return HTTPStatus.INTERNAL_SERVER_ERROR
+        if chance < self.error_rate + self.throttle_rate:
+            with self._lock:
+                self.throttled += 1
+            return HTTPStatus.TOO_MANY_REQUESTS
+        return HTTPStatus.OK
+
+    def stats(self):
+        """Метод возвращает счётчики стенда."""
+        with self._lock:
+            return dict(
+                polls=self.polls,
+                errors=self.errors,
+                throttled=self.throttled,
+                messages=self.messages,
+                notifications=len(self.latencies),
+                latency_p50=percentile(self.latencies, 0.5),
+                latency_p99=percentile(self.latencies, 0.99),
+            )
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов к стенду."""
+
+    protocol_version = 'HTTP/1.1'
+    world = None
+
+    def log_message(self, *args):
+        """Журнал запросов стенду не нужен."""
+
+    def _reply(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length).decode('utf-8')
+        if self.headers.get('Content-Type', '').startswith('application/json'):
+            return json.loads(raw)
+        return {key: values[0] for key, values in parse_qs(raw).items()}
+
+    def do_GET(self):
+        """Ответ API Практикум.Домашка и статистика стенда."""
+        url = urlparse(self.path)
+        if url.path == STATS_PATH:
+            return self._reply(HTTPStatus.OK, self.world.stats())
+        if url.path != HOMEWORKS_PATH:
+            return self._reply(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+        time.sleep(self.world.latency)
+        authorization = self.headers.get('Authorization', '')
+        if not authorization.startswith('OAuth '):
+            return self._reply(HTTPStatus.UNAUTHORIZED, {
+                'code': 'not_authenticated',
+                'message': 'Учетные данные не были предоставлены.',
+            })
+        status = self.world.roll()
+        if status == HTTPStatus.TOO_MANY_REQUESTS:
+            return self._reply(
+                status, {}, {'Retry-After': str(self.world.retry_after)}
+            )
+        if status != HTTPStatus.OK:
+            return self._reply(status, {})
+        from_date = int(float(parse_qs(url.query).get('from_date', [0])[0]))
+        self._reply(
+            HTTPStatus.OK,
+            self.world.poll(authorization[len('OAuth '):], from_date)
+        )
+
+    def do_POST(self):
+        """Ответ Telegram Bot API на sendMessage."""
+        if not SEND_MESSAGE.match(urlparse(self.path).path):
+            return self._reply(HTTPStatus.NOT_FOUND, {
+                'ok': False, 'error_code': 404, 'description': 'Not Found'
+            })
+        data = self._body()
+        time.sleep(self.world.latency)
+        status = self.world.roll()
+        if status == HTTPStatus.TOO_MANY_REQUESTS:
+            return self._reply(status, {
+                'ok': False,
+                'error_code': 429,
+                'description': 'Too Many Requests',
+                'parameters': {'retry_after': self.world.retry_after},
+            })
+        if status != HTTPStatus.OK:
+            return self._reply(status, {
+                'ok': False, 'error_code': 500, 'description': 'Fake error'
+            })
+        self.world.deliver(data.get('text', ''))
+        self._reply(HTTPStatus.OK, {'ok': True, 'result': {
+            'message_id': self.world.messages,
+            'date': int(time.time()),
+            'chat': {'id': int(data['chat_id']), 'type': 'private'},
+            'text': data.get('text', ''),
+        }})
+
+
+class FakeServer:
+    """Стенд в фоновом потоке: start() возвращает базовый адрес."""
+
+    def __init__(self, world=None, host='127.0.0.1', port=0):
+        self.world = world or FakeWorld()
+        handler = type('Handler', (FakeHandler,), {'world': self.world})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """Базовый адрес стенда."""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def endpoint(self):
+        """Адрес замены API Практикум.Домашка."""
+        return self.url + HOMEWORKS_PATH
+
+    @property
+    def bot_url(self):
+        """Базовый адрес замены Telegram Bot API для telegram.Bot."""
+        return self.url + '/bot'
+
+    def start(self):
+        """Метод запускает стенд в фоновом потоке."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """Метод останавливает стенд."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def parse_args(argv=None):
+    """Функция разбирает параметры запуска стенда."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--churn', type=float, default=0.1)
+    parser.add_argument('--homeworks', type=int, default=3)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Функция запуска стенда до прерывания."""
+    args = parse_args(argv)
+    world = FakeWorld(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        churn=args.churn,
+        homeworks_per_token=args.homeworks,
+    )
+    server = FakeServer(world, args.host, args.port)
+    print(server.start(), flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Нагрузочный тест цикла опроса на локальном стенде.
+
+Запуск: python -m benchmarks.load_test --tenants 1000 --duration 60
+Стенд работает в отдельном процессе, поэтому CPU и RSS в отчёте
+относятся только к боту.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen
+
+import homework
+import transport
+from benchmarks.fake_api import HOMEWORKS_PATH, STATS_PATH
+from ratelimit import KeyedLimiter, TokenBucket
+from scheduler import AdaptivePolicy
+from state import MemoryStateStore
+from tenants import Tenant
+
+BOT_TOKEN = '123456:LOADTEST'
+
+
+def parse_args(argv=None):
+    """Функция разбирает параметры нагрузочного теста."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--chats', type=int, default=1,
+                        help='чатов на каждый токен')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--period', type=float, default=5,
+                        help='период опроса подписки, с')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--churn', type=float, default=0.2)
+    parser.add_argument('--practicum-rate', type=float, default=1e6)
+    parser.add_argument('--telegram-rate', type=float, default=1e6)
+    parser.add_argument('--max-p99', type=float,
+                        help='предел p99 задержки уведомления, с')
+    parser.add_argument('--min-polls-per-second', type=float,
+                        help='нижний предел опросов в секунду')
+    return parser.parse_args(argv)
+
+
+def start_stand(args):
+    """Функция запускает стенд в отдельном процессе.
+    Возвращает процесс и базовый адрес стенда.
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'benchmarks.fake_api', '--port', '0',
+            '--latency', str(args.latency),
+            '--error-rate', str(args.error_rate),
+            '--throttle-rate', str(args.throttle_rate),
+            '--churn', str(args.churn),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    return process, process.stdout.readline().strip()
+
+
+async def drive(outbox, tenants, args):
+    """Корутина гоняет цикл опроса заданное время."""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=args.concurrency)
+    )
+    poller = homework.Poller(
+        outbox, tenants, MemoryStateStore(),
+        policy=AdaptivePolicy(args.period, jitter=0),
+        concurrency=args.concurrency,
+    )
+    try:
+        await asyncio.wait_for(poller.run(), args.duration)
+    except asyncio.TimeoutError:
+        pass
+    return poller
+
+
+def run(args):
+    """Функция выполняет нагрузочный тест и возвращает отчёт."""
+    process, url = start_stand(args)
+    try:
+        homework.ENDPOINT = url + HOMEWORKS_PATH
+        homework.RETRY_TIME = args.period
+        homework.PRACTICUM_LIMITER = TokenBucket(args.practicum_rate)
+        homework.TELEGRAM_LIMITER = TokenBucket(args.telegram_rate)
+        homework.CHAT_LIMITER = KeyedLimiter(args.telegram_rate)
+        outbox = homework.make_outbox(
+            transport.make_bot(BOT_TOKEN, base_url=url + '/bot')
+        )
+        outbox.start()
+        tenants = [
+            Tenant(f'token-{number}', str(number * args.chats + chat))
+            for number in range(args.tenants)
+            for chat in range(args.chats)
+        ]
+        cpu_started = time.process_time()
+        started = time.monotonic()
+        poller = asyncio.run(drive(outbox, tenants, args))
+        outbox.stop(timeout=args.period)
+        elapsed = time.monotonic() - started
+        cpu = time.process_time() - cpu_started
+        with urlopen(url + STATS_PATH) as response:
+            stand = json.load(response)
+    finally:
+        process.terminate()
+        process.wait()
+    return dict(
+        tenants=args.tenants,
+        chats=args.tenants * args.chats,
+        duration=round(elapsed, 3),
+        polls_per_second=round(stand['polls'] / elapsed, 2),
+        notification_latency_p50=stand['latency_p50'],
+        notification_latency_p99=stand['latency_p99'],
+        cpu_seconds=round(cpu, 3),
+        cpu_share=round(cpu / elapsed, 3),
+        max_rss_mb=round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+        scheduler_lag=poller.lag.as_dict(),
+        stand=stand,
+    )
+
+
+def check_limits(report, args):
+    """Функция проверяет отчёт на регрессии и возвращает код выхода."""
+    failed = False
+    p99 = report['notification_latency_p99']
+    if args.max_p99 is not None and (p99 is None or p99 > args.max_p99):
+        failed = True
+    polls = report['polls_per_second']
+    if (args.min_polls_per_second is not None
+            and polls < args.min_polls_per_second):
+        failed = True
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    """Функция запуска нагрузочного теста."""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.CRITICAL)
+    report = run(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return check_limits(report, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Время импорта бота по данным python -X importtime.
+
+Запуск: python -m benchmarks.startup --repeat 5 --max-ms 250
+Отчёт содержит медиану времени импорта homework, самые долгие
+импорты верхнего уровня и тяжёлые модули, загруженные при импорте,
+хотя должны загружаться при первом обращении.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+ROOT = dirname(dirname(abspath(__file__)))
+MODULE = 'homework'
+DEFERRED = ('requests.adapters', 'telegram.bot', 'urllib3')
+# Модули, которые не должны загружаться при импорте бота
+LOADED_SCRIPT = (
+    'import json, sys; import {}; '
+    'print(json.dumps([name for name in {!r} if name in sys.modules]))'
+)
+
+
+def parse_args(argv=None):
+    """Функция разбирает параметры замера."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default=MODULE)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--max-ms', type=float,
+                        help='предел медианы времени импорта, мс')
+    return parser.parse_args(argv)
+
+
+def import_times(module):
+    """Функция импортирует module в новом процессе.
+    Возвращает словарь модуль - (собственное, общее время, глубина) в мкс.
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        times[name.strip()] = (int(own), int(cumulative), depth)
+    return times
+
+
+def loaded_modules(module, names):
+    """Функция возвращает модули из names, загруженные импортом module."""
+    process = subprocess.run(
+        [sys.executable, '-c', LOADED_SCRIPT.format(module, tuple(names))],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(process.stdout)
+
+
+def run(args):
+    """Функция выполняет замеры и возвращает отчёт."""
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    last = runs[-1]
+    depth = last[args.module][2]
+    children = sorted(
+        (
+            (name, cumulative) for name, (_, cumulative, level)
+            in last.items() if level == depth + 1
+        ),
+        key=lambda item: item[1], reverse=True,
+    )
+    return dict(
+        module=args.module,
+        import_ms=round(statistics.median(
+            times[args.module][1] for times in runs
+        ) / 1000, 1),
+        top=[
+            dict(module=name, ms=round(cumulative / 1000, 1))
+            for name, cumulative in children[:args.top]
+        ],
+        eager=loaded_modules(args.module, DEFERRED),
+    )
+
+
+def main(argv=None):
+    """Функция запуска замера, код выхода 1 при регрессии."""
+    args = parse_args(argv)
+    report = run(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    too_slow = args.max_ms is not None and report['import_ms'] > args.max_ms
+    return 1 if too_slow or report['eager'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Выключатели вызовов внешних сервисов на время их отказа."""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from exceptions import CircuitOpen
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+CIRCUIT_OPEN_ERROR = 'Сервис {} временно недоступен'
+STATE_CHANGE_LOG = 'Выключатель {}: {} -> {}'
+
+
+class CircuitBreaker:
+    """Выключатель вызовов одного внешнего сервиса.
+    Замкнутый выключатель помнит итоги последних window вызовов и
+    размыкается, когда среди не менее min_calls из них доля отказов
+    достигает failure_rate. Разомкнутый отклоняет вызовы reset_timeout
+    секунд, затем пропускает probes пробных вызовов: их успех замыкает
+    выключатель, отказ снова размыкает.
+    После allow() вызывающий сообщает итог через success() или failure().
+    """
+
+    def __init__(self, name, failure_rate=0.5, window=20, min_calls=5,
+                 reset_timeout=30.0, probes=1, clock=time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._results = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_passed = 0
+        self.rejected = 0
+
+    @property
+    def state(self):
+        """Текущее состояние выключателя."""
+        with self._lock:
+            return self._current_state()
+
+    def allow(self):
+        """Метод пропускает вызов или выбрасывает CircuitOpen."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._probes_started < self.probes:
+                self._probes_started += 1
+                return
+            self.rejected += 1
+            retry_after = max(
+                self._opened_at + self.reset_timeout - self._clock(), 0.0
+            )
+        raise CircuitOpen(CIRCUIT_OPEN_ERROR.format(self.name), retry_after)
+
+    def success(self):
+        """Метод учитывает успешный вызов."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_passed += 1
+                if self._probes_passed >= self.probes:
+                    self._move(CLOSED)
+                return
+            self._results.append(False)
+
+    def failure(self):
+        """Метод учитывает отказ сервиса."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._results.append(True)
+            if (self._state == CLOSED
+                    and len(self._results) >= self.min_calls
+                    and sum(self._results) >= self.failure_rate
+                    * len(self._results)):
+                self._open()
+
+    def _current_state(self):
+        if (self._state == OPEN
+                and self._clock() - self._opened_at >= self.reset_timeout):
+            self._move(HALF_OPEN)
+        return self._state
+
+    def _open(self):
+        self._opened_at = self._clock()
+        self._move(OPEN)
+
+    def _move(self, state):
+        logging.warning(STATE_CHANGE_LOG.format(self.name, self._state, state))
+        self._state = state
+        self._results.clear()
+        self._probes_started = 0
+        self._probes_passed = 0
@@ -0,0 +1,99 @@
+"""Кэш ответов API Практикума с условными запросами."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheEntry:
+    """Сохранённый ответ API на from_date и его валидаторы."""
+
+    __slots__ = ('from_date', 'body', 'etag', 'last_modified', 'stored_at')
+
+    def __init__(self, from_date, body, etag, last_modified, stored_at):
+        self.from_date = from_date
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+
+class ResponseCache:
+    """Кэш ответов по ключу (токен, from_date) с TTL и вытеснением LRU.
+    Свежая запись отдаётся без запроса к API. Устаревшая запись хранит
+    валидаторы для условного запроса, ответ 304 продлевает её.
+    На токен хранится одна запись: после сдвига from_date ответ
+    на прежнюю дату больше не запрашивается и вытесняется новым,
+    поэтому maxsize ограничивает число токенов, а не их историю.
+    """
+
+    def __init__(self, ttl, maxsize, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def _entry(self, key):
+        token, from_date = key
+        entry = self._entries.get(token)
+        if entry is None or entry.from_date != from_date:
+            return None
+        self._entries.move_to_end(token)
+        return entry
+
+    def get_fresh(self, key):
+        """Метод возвращает свежий ответ из кэша или None."""
+        with self._lock:
+            entry = self._entry(key)
+            now = self._clock()
+            if entry is not None and now - entry.stored_at < self.ttl:
+                self.hits += 1
+                return entry.body
+            self.misses += 1
+            return None
+
+    def validators(self, key):
+        """Метод возвращает заголовки условного запроса для ключа."""
+        with self._lock:
+            entry = self._entry(key)
+        headers = {}
+        if entry is not None and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def revalidate(self, key):
+        """Метод продлевает запись после ответа 304 и возвращает её."""
+        with self._lock:
+            entry = self._entry(key)
+            if entry is None:
+                return None
+            entry.stored_at = self._clock()
+            self.revalidated += 1
+            return entry.body
+
+    def store(self, key, body, etag=None, last_modified=None):
+        """Метод сохраняет ответ API, вытесняя давно не нужные записи."""
+        token, from_date = key
+        with self._lock:
+            self._entries[token] = CacheEntry(
+                from_date, body, etag, last_modified, self._clock()
+            )
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        """Метод возвращает счётчики попаданий и промахов."""
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                revalidated=self.revalidated,
+                size=len(self._entries),
+            )
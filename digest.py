@@ -0,0 +1,94 @@
+"""Сводки повторяющихся ошибок вместо сообщения на каждую."""
+
+import re
+import threading
+import time
+
+NORMALIZE_PATTERNS = (
+    (re.compile(r'\w+://\S+'), '<url>'),
+    (re.compile(r'\{[^{}]*\}'), '{}'),
+    (re.compile(r'\'[^\']*\'|"[^"]*"'), "''"),
+    (re.compile(r'\b[0-9a-fA-F]{8,}\b'), '<id>'),
+    (re.compile(r'\d+(\.\d+)?'), '#'),
+    (re.compile(r'\s+'), ' '),
+)
+# Изменчивые части текста ошибки: адреса, параметры, строки и числа
+DIGEST_TITLE = 'Сводка ошибок за последние {} мин:'
+DIGEST_LINE = '{} ×{}: {}'
+
+
+def normalize(text):
+    """Функция убирает из текста ошибки изменчивые части."""
+    for pattern, replacement in NORMALIZE_PATTERNS:
+        previous = None
+        while previous != text:
+            previous, text = text, pattern.sub(replacement, text)
+    return text.strip()
+
+
+def fingerprint(error):
+    """Функция возвращает отпечаток ошибки: класс и нормализованный текст."""
+    return type(error).__name__, normalize(str(error))
+
+
+class ErrorEntry:
+    """Первое появление ошибки с отпечатком и число её повторов."""
+
+    __slots__ = ('first_seen', 'repeats', 'sample')
+
+    def __init__(self, first_seen, sample):
+        self.first_seen = first_seen
+        self.repeats = 0
+        self.sample = sample
+
+
+class ErrorAggregator:
+    """Счётчик ошибок всех подписок процесса по отпечаткам.
+    Ключ - адресат сообщений об ошибке, например чат. Первая ошибка
+    с отпечатком сообщается сразу, повторы в течение window секунд
+    только считаются и попадают в сводку по истечении окна.
+    """
+
+    def __init__(self, window=3600, clock=time.monotonic):
+        self.window = window
+        self._clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, error):
+        """Метод учитывает ошибку.
+        Возвращает True, если о ней нужно сообщить сразу.
+        """
+        name, text = fingerprint(error)
+        with self._lock:
+            entry = self._entries.get((key, name, text))
+            if entry is not None:
+                entry.repeats += 1
+                return False
+            self._entries[key, name, text] = ErrorEntry(
+                self._clock(), str(error)
+            )
+            return True
+
+    def digest(self):
+        """Метод закрывает истёкшие окна и возвращает сводки.
+        Возвращает словарь ключ - текст сводки для ключей,
+        у которых в закрытых окнах были повторы.
+        """
+        now = self._clock()
+        lines = {}
+        with self._lock:
+            for entry_key, entry in list(self._entries.items()):
+                if now - entry.first_seen < self.window:
+                    continue
+                del self._entries[entry_key]
+                key, name, _ = entry_key
+                if entry.repeats:
+                    lines.setdefault(key, []).append(DIGEST_LINE.format(
+                        name, entry.repeats + 1, entry.sample
+                    ))
+        title = DIGEST_TITLE.format(round(self.window / 60))
+        return {
+            key: '\n'.join([title] + key_lines)
+            for key, key_lines in lines.items()
+        }
@@ -7,3 +7,42 @@ class ResponseException(Exception):
 
 class ServiceDenial(Exception):
     "Отказ в обслуживании"
+
+
+class RateLimited(Exception):
+    "Превышен предел частоты запросов, повтор через retry_after секунд"
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ResponseSchemaError(Exception):
+    "Ответ API не соответствует ожидаемой схеме"
+
+    def __str__(self):
+        return str(self.args[0]) if self.args else ''
+
+
+class MissingFieldError(ResponseSchemaError, KeyError):
+    "В ответе API отсутствует обязательное поле"
+
+
+class FieldTypeError(ResponseSchemaError, TypeError):
+    "Поле ответа API имеет неверный тип"
+
+
+class UnknownStatusError(ResponseSchemaError, ValueError):
+    "Недокументированный статус домашней работы"
+
+
+class UnknownSubscription(LookupError):
+    "Нет подписки для токена из присланного события"
+
+
+class ShuttingDown(Exception):
+    "Бот останавливается и не принимает новые события"
+
+
+class CircuitOpen(RateLimited):
+    "Выключатель сервиса разомкнут, вызовы отклоняются retry_after секунд"
@@ -1,15 +1,51 @@
 """Телеграм-бот, проверяющий статус код-ревью."""
 
+import argparse
+import asyncio
 import logging
 import os
+import signal
+import socket
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+from functools import partial
+from http import HTTPStatus
 
-import requests
-import telegram
 from dotenv import load_dotenv
 
-from exceptions import ResponseException, ServiceDenial
+import metrics
+import transport
+import webhook
+from log_config import configure_logging, dropped_records
+from breaker import STATE_CODES, CircuitBreaker
+from cache import ResponseCache
+from digest import ErrorAggregator
+from exceptions import (CircuitOpen, MissingFieldError, RateLimited,
+                        ResponseException, ServiceDenial, ShuttingDown,
+                        UnknownSubscription)
+from offload import BatchExecutor
+from outbox import Outbox
+from ratelimit import (FloodWaits, KeyedLimiter, TokenBucket,
+                       parse_retry_after)
+from records import (Homework, decode_json, decode_payload, homeworks_list,
+                     parse_homeworks)
+from streaming import HomeworkStream
+from templates import LOCALES, TemplateSet
+from scheduler import (POLL_EMPTY, POLL_ERROR, POLL_UNDELIVERED, POLL_UPDATED,
+                       AdaptivePolicy, LagStats, PollQueue)
+from sharding import Shard, SqliteLeases
+from state import SqliteStateStore, open_store
+from tenants import (Tenant, group_by_token, load_tenants, split_chat_ids,
+                     token_key)
+from lazy import lazy_import
+
+requests = lazy_import('requests')
+telegram = lazy_import('telegram')
+# Тяжёлые зависимости загружаются при первом обращении
 
 load_dotenv()
 
@@ -18,11 +54,130 @@ PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 ALL_TOKEN_NAMES = ['PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID']
+SUBSCRIPTIONS_FILE = os.getenv('SUBSCRIPTIONS_FILE')
+# Таблица подписок для опроса многих токенов одним процессом
+SUBSCRIPTIONS_WATCH_INTERVAL = float(
+    os.getenv('SUBSCRIPTIONS_WATCH_INTERVAL', 30)
+)
+# Период проверки изменения файла подписок, 0 - только по SIGHUP
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 25))
+# Общее время на остановку: начатые опросы ждут не больше
+# SHUTDOWN_POLLS_SHARE от него, остаток получает очередь исходящих.
+# Heroku и Kubernetes по умолчанию дают 30 с до SIGKILL
+SHUTDOWN_POLLS_SHARE = 0.5
 
 RETRY_TIME = 600  # Период времени запроса к серверу
+POLL_CONCURRENCY = int(os.getenv('POLL_CONCURRENCY', 64))
+# Предел одновременных запросов к API в цикле событий
+STATE_STORE = os.getenv('STATE_STORE', __file__ + '.state.json')
+# Файл состояния опроса: .json или .db/.sqlite/.sqlite3
+STATE_FLUSH_INTERVAL = float(os.getenv('STATE_FLUSH_INTERVAL', 5))
+# Период записи состояния в JSON-файл, 0 - запись на каждое изменение.
+# SQLite пишет каждое изменение отдельной транзакцией
+SHARDING = os.getenv('SHARDING') == '1'
+WORKER_ID = os.getenv('WORKER_ID', f'{socket.gethostname()}-{os.getpid()}')
+SHARD_LEASE_TTL = float(os.getenv('SHARD_LEASE_TTL', 60))
+# Деление подписок между обработчиками через общую базу SQLite
+PRACTICUM_RATE = float(os.getenv('PRACTICUM_RATE', 20))
+# Предел запросов к API Практикума в секунду на процесс
+TELEGRAM_RATE = float(os.getenv('TELEGRAM_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+# Пределы Telegram: сообщений в секунду всего и в один чат
+TELEGRAM_SEND_ATTEMPTS = 3  # Попытки отправки при ответе RetryAfter
+PRACTICUM_LIMITER = TokenBucket(PRACTICUM_RATE)
+TELEGRAM_LIMITER = TokenBucket(TELEGRAM_RATE)
+CHAT_LIMITER = KeyedLimiter(TELEGRAM_CHAT_RATE)
+TELEGRAM_FLOOD_CHATS = int(os.getenv('TELEGRAM_FLOOD_CHATS', 3))
+# Число чатов с одновременной паузой RetryAfter, после которого
+# пауза считается общей и останавливает отправку во все чаты
+FLOOD_WAITS = FloodWaits(TELEGRAM_FLOOD_CHATS)
+BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', 0.5))
+BREAKER_WINDOW = int(os.getenv('BREAKER_WINDOW', 20))
+BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', 5))
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', 60))
+# Выключатели: доля отказов среди последних вызовов и пауза до пробы
+PRACTICUM_BREAKER = CircuitBreaker(
+    'practicum', BREAKER_FAILURE_RATE, BREAKER_WINDOW, BREAKER_MIN_CALLS,
+    BREAKER_RESET_TIMEOUT
+)
+TELEGRAM_BREAKER = CircuitBreaker(
+    'telegram', BREAKER_FAILURE_RATE, BREAKER_WINDOW, BREAKER_MIN_CALLS,
+    BREAKER_RESET_TIMEOUT
+)
+ERROR_WINDOW = float(os.getenv('ERROR_WINDOW', 3600))
+ERROR_DIGEST_INTERVAL = float(os.getenv('ERROR_DIGEST_INTERVAL', 60))
+# Окно сводки повторяющихся ошибок и период проверки готовых сводок
+ERRORS = ErrorAggregator(ERROR_WINDOW)
+OUTBOX_SIZE = int(os.getenv('OUTBOX_SIZE', 1000))
+OUTBOX_WORKERS = int(os.getenv('OUTBOX_WORKERS', 4))
+OUTBOX_ATTEMPTS = int(os.getenv('OUTBOX_ATTEMPTS', 5))
+OUTBOX_BACKOFF = float(os.getenv('OUTBOX_BACKOFF', 2))
+OUTBOX_COALESCE = os.getenv('OUTBOX_COALESCE', '1') == '1'
+DEAD_LETTER_FILE = os.getenv('DEAD_LETTER_FILE', __file__ + '.dead.jsonl')
+# Очередь исходящих сообщений и файл недоставленных сообщений
+API_CACHE_TTL = float(os.getenv('API_CACHE_TTL', 30))
+API_CACHE_SIZE = int(os.getenv('API_CACHE_SIZE', 10000))
+# Кэш ответов API по паре (токен, from_date), одна запись на токен
+API_CACHE = ResponseCache(API_CACHE_TTL, API_CACHE_SIZE)
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+# Адрес HTTP-сервера /metrics, порт 0 отключает сервер
+SEND_FAILURES = metrics.Counter(
+    'homework_send_failures_total', 'Неотправленные сообщения Telegram'
+)
+POLLS = metrics.Counter(
+    'homework_polls_total', 'Опросы API по итогам', ['outcome']
+)
+SCHEDULER_LAG = metrics.Histogram(
+    'homework_scheduler_lag_seconds',
+    'Опоздание опроса относительно назначенного времени',
+)
+OUTBOX_DEPTH = metrics.Gauge(
+    'homework_outbox_depth', 'Сообщения в очереди исходящих'
+)
+WEBHOOK_EVENTS = metrics.Counter(
+    'homework_webhook_events_total', 'Присланные события по итогам',
+    ['outcome']
+)
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 0))
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '127.0.0.1')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+# Приёмник событий о статусах, порт 0 отключает приёмник
+RECONCILE_INTERVAL = float(os.getenv('RECONCILE_INTERVAL', RETRY_TIME))
+# Период сверочного опроса API при включённом приёмнике событий
+CIRCUIT_STATE = metrics.Gauge(
+    'homework_circuit_state',
+    'Состояние выключателя: 0 замкнут, 1 проба, 2 разомкнут', ['upstream']
+)
+CIRCUIT_REJECTED = metrics.Gauge(
+    'homework_circuit_rejected_calls',
+    'Вызовы, отклонённые разомкнутым выключателем', ['upstream']
+)
+API_CACHE_REQUESTS = metrics.Gauge(
+    'homework_api_cache_requests',
+    'Обращения к кэшу ответов API: hits, misses, revalidated', ['result']
+)
+API_CACHE_ENTRIES = metrics.Gauge(
+    'homework_api_cache_entries', 'Записи в кэше ответов API'
+)
+LOG_DROPPED = metrics.Gauge(
+    'homework_log_records_dropped',
+    'Записи журнала, отброшенные при переполнении очереди'
+)
+CPU_WORKERS = int(os.getenv('CPU_WORKERS', 0))
+CPU_BATCH_SIZE = int(os.getenv('CPU_BATCH_SIZE', 32))
+CPU_BATCH_DELAY = float(os.getenv('CPU_BATCH_DELAY', 0.002))
+CPU_POOL_MIN_BYTES = int(os.getenv('CPU_POOL_MIN_BYTES', 64 * 1024))
+# Разбор ответов в пуле процессов: число процессов (0 - без пула),
+# размер пакета, ожидание пакета и размер ответа, с которого пул
+# выгоднее разбора в потоке (см. benchmarks/cpu_pool.py)
+CPU_POOL = None
+STREAM_HISTORY = os.getenv('STREAM_HISTORY') == '1'
+STREAM_CHUNK_SIZE = 64 * 1024
+# Потоковый разбор первого ответа с from_date=0 для длинных историй
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 # API Яндекс Практикум.Домашка
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+AUTHORIZATION = 'OAuth {}'
 # Процесс авторизации  на платформе Яндекс Практикум путем присвоения токена
 
 HOMEWORK_VERDICTS = {  # Статусы код-ревью
@@ -37,32 +192,81 @@ SEND_MESSAGE_INFO_LOG = ('Сообщение отправлено: {}')
 SEND_MESSAGE_EXCEPTION_LOG = ('Сообщение {} в Telegram не отправлено: {}')
 GET_API_ANSWER_REQUEST_ERROR = (
     'Некорректный запрос: {}. '
-    'Передаваемые параметры:{url}, {headers}, {params}'
+    'Передаваемые параметры:{url}, {params}'
 )
 GET_API_ANSWER_RESPONSE_ERROR = (
     'Ответ сервера = {}. '
-    'Входящие параметры: {url}, {headers}, {params}. '
+    'Входящие параметры: {url}, {params}. '
+)
+RATE_LIMITED_ERROR = (
+    'Превышен предел запросов, повтор через {} с. '
+    'Входящие параметры: {url}, {params}.'
+)
+SEND_MESSAGE_RETRY_LOG = (
+    'Превышен предел отправки в Telegram, повтор через {} с'
 )
 SERVICE_DENIAL_ERROR = (
     'Отказ в обслуживании:{}: {}. '
-    'Входящие параметры: {url}, {headers}, {params}.'
+    'Входящие параметры: {url}, {params}.'
 )
-TYPE_ERROR_LIST = 'Неверный тип данных: {}. Ожидается список.'
-TYPE_ERROR_DICT = 'Неверный тип данных: {}. Ожидается словарь.'
-KEY_ERROR = 'Невозможно получить значение по ключу: homeworks.'
 PARSE_STATUS_RETURN = (
     'Изменился статус проверки работы "{}". '
     '{}'
 )
+DEFAULT_LOCALE = 'ru'
+TEMPLATES = TemplateSet(  # Шаблоны сообщений, компилируются при запуске
+    {
+        DEFAULT_LOCALE: {
+            'message': PARSE_STATUS_RETURN.format('{name}', '{verdict}'),
+            'verdicts': HOMEWORK_VERDICTS,
+        },
+        **LOCALES,
+    },
+    DEFAULT_LOCALE,
+    cache_size=int(os.getenv('TEMPLATE_CACHE_SIZE', 4096)),
+)
+MESSAGE_SEPARATOR = '\n\n'
+MESSAGE_MAX_LENGTH = 4096  # Предел длины сообщения Telegram
 MAIN_EXCEPTION_MESSAGE = 'Сбой в работе программы: {}'
 NO_NEW_STATUS_IN_API = 'Отсутствие в ответе новых статусов'
 MAIN_EXCEPTION_ERROR = 'Ошибка: {}'
+SUBSCRIPTIONS_LOADED = 'Загружено подписок: {}'
+SUBSCRIPTIONS_RELOADED = (
+    'Подписки обновлены: токенов добавлено {}, снято {}, всего {}'
+)
+SUBSCRIPTIONS_RELOAD_ERROR = 'Подписки не обновлены: {}'
+SIGNAL_LOG = 'Получен сигнал {}'
+POLL_FAILED_LOG = 'Опрос токена {} завершился ошибкой: {}'
+SHUTDOWN_TIMEOUT_LOG = 'Опросов не завершилось за {:.1f} с: {}'
+SHUTTING_DOWN_ERROR = 'Бот останавливается, событие не принято'
+SHARDING_STORE_CRITICAL_LOG = (
+    'Для SHARDING=1 нужно общее хранилище SQLite, задано: {}'
+)
+UNKNOWN_SUBSCRIPTION_ERROR = 'Нет подписки для токена события'
+CPU_POOL_BROKEN_LOG = 'Ответ разобран в потоке, пул процессов сломан: {}'
+ONCE_FINISHED_LOG = (
+    'Опрос завершён: {} токенов, {} с ошибкой, {} с недоставленными '
+    'сообщениями'
+)
+ONCE_HELP = (
+    'выполнить один цикл опроса всех подписок и завершиться, '
+    'код выхода {} при ошибках опроса'.format(os.EX_TEMPFAIL)
+)
+
+
+def required_token_names():
+    """Функция возвращает имена обязательных переменных окружения.
+    При заданном файле подписок токен и чат берутся из него.
+    """
+    if SUBSCRIPTIONS_FILE:
+        return ['TELEGRAM_TOKEN']
+    return ALL_TOKEN_NAMES
 
 
 def check_tokens():
     """Функция проверяет доступность переменных окружения."""
     are_tokens_valid = True
-    for name in ALL_TOKEN_NAMES:
+    for name in required_token_names():
         if not globals()[name]:
             are_tokens_valid = False
             logging.critical(CHECK_TOKENS_CRITICAL_LOG.format(name))
@@ -71,104 +275,1128 @@ def check_tokens():
 
 def send_message(bot, message):
     """Функция отправки сообщения."""
-    success = True
-    try:
-        bot.send_message(TELEGRAM_CHAT_ID, text=message)
-        logging.info(SEND_MESSAGE_INFO_LOG.format(message))
-    except telegram.TelegramError as telegram_error:
-        logging.exception(SEND_MESSAGE_EXCEPTION_LOG(message, telegram_error))
-        success = False
-    return success
+    return send_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+@metrics.instrument('send_message')
+def send_to_chat(bot, chat_id, message, parse_mode=None, defer=False):
+    """Функция отправки сообщения в заданный чат.
+    parse_mode - режим разметки Telegram, по умолчанию простой текст.
+    С defer при разомкнутом выключателе выбрасывается CircuitOpen,
+    чтобы очередь исходящих отложила сообщение до пробного вызова.
+    Соблюдает общий предел Telegram и предел чата. RetryAfter
+    приостанавливает отправку в этот чат, а при паузах сразу во многих
+    чатах - во все, после чего отправка повторяется. При разомкнутом
+    выключателе Telegram сообщение не отправляется.
+    """
+    for _ in range(TELEGRAM_SEND_ATTEMPTS):
+        try:
+            TELEGRAM_BREAKER.allow()
+        except CircuitOpen as circuit_open:
+            if defer:
+                raise
+            error = circuit_open
+            break
+        TELEGRAM_LIMITER.acquire()
+        CHAT_LIMITER.acquire(chat_id)
+        try:
+            bot.send_message(
+                chat_id, text=message,
+                **({'parse_mode': parse_mode} if parse_mode else {})
+            )
+            TELEGRAM_BREAKER.success()
+            logging.info(SEND_MESSAGE_INFO_LOG.format(message))
+            return True
+        except telegram.error.RetryAfter as retry:
+            TELEGRAM_BREAKER.success()
+            logging.warning(SEND_MESSAGE_RETRY_LOG.format(retry.retry_after))
+            CHAT_LIMITER.bucket(chat_id).pause(retry.retry_after)
+            if FLOOD_WAITS.record(chat_id, retry.retry_after):
+                TELEGRAM_LIMITER.pause(retry.retry_after)
+            error = retry
+        except telegram.TelegramError as telegram_error:
+            record_telegram_error(telegram_error)
+            error = telegram_error
+            break
+    logging.error(SEND_MESSAGE_EXCEPTION_LOG.format(message, error))
+    SEND_FAILURES.inc()
+    return False
+
+
+def record_telegram_error(error):
+    """Функция учитывает ошибку Telegram в выключателе.
+    Отказом сервиса считаются только сетевые ошибки и таймауты,
+    ошибки запроса к отдельному чату сервис не характеризуют.
+    """
+    if (isinstance(error, telegram.error.TimedOut)
+            or type(error) is telegram.error.NetworkError):
+        TELEGRAM_BREAKER.failure()
+    else:
+        TELEGRAM_BREAKER.success()
 
 
 def get_api_answer(current_timestamp):
     """Функция делает запрос к API Практикум.Домашка."""
+    return request_api_answer(
+        practicum_headers(PRACTICUM_TOKEN), current_timestamp
+    )
+
+
+def practicum_headers(practicum_token):
+    """Функция возвращает заголовки авторизации для токена.
+    Заголовки строятся при запросе, поэтому заданный после импорта
+    токен тоже учитывается.
+    """
+    return {'Authorization': AUTHORIZATION.format(practicum_token)}
+
+
+def get_tenant_answer(practicum_token, current_timestamp):
+    """Функция делает запрос к API от имени токена подписки."""
+    headers = practicum_headers(practicum_token)
+    return request_api_answer(headers, current_timestamp)
+
+
+def send_api_request(headers, current_timestamp, extra_headers=None,
+                     **kwargs):
+    """Функция отправляет запрос к API и проверяет ответ на 429.
+    Возвращает ответ и параметры запроса для сообщений об ошибках.
+    Сетевые ошибки и ответы 5xx размыкают выключатель Практикума,
+    после чего запросы не отправляются до пробного.
+    """
     params = {'from_date': current_timestamp}
-    data = dict(url=ENDPOINT, headers=HEADERS, params=params)
+    data = dict(url=ENDPOINT, headers=headers, params=params)
+    request = dict(data, **kwargs)
+    if extra_headers:
+        request['headers'] = {**headers, **extra_headers}
+    PRACTICUM_BREAKER.allow()
+    PRACTICUM_LIMITER.acquire()
     try:
-        response = requests.get(**data)
+        response = transport.get_session().get(
+            **request, timeout=transport.TIMEOUT
+        )
     except requests.exceptions.RequestException as request_error:
+        PRACTICUM_BREAKER.failure()
         raise ConnectionError(
             GET_API_ANSWER_REQUEST_ERROR.format(request_error, **data)
         )
-    response_json = response.json()
+    if response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+        PRACTICUM_BREAKER.failure()
+    else:
+        PRACTICUM_BREAKER.success()
+    if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+        retry_after = parse_retry_after(
+            getattr(response, 'headers', {}).get('Retry-After'), RETRY_TIME
+        )
+        raise RateLimited(
+            RATE_LIMITED_ERROR.format(retry_after, **data), retry_after
+        )
+    return response, data
+
+
+def check_service_denial(response_json, data):
+    """Функция выбрасывает ServiceDenial, если API вернул код ошибки."""
     for error in ['code', 'error']:
         if error in response_json:
             raise ServiceDenial(
                 SERVICE_DENIAL_ERROR.format(
                     error, response_json[error], **data)
             )
+
+
+@metrics.instrument('get_api_answer')
+def request_api_answer(headers, current_timestamp):
+    """Функция выполняет запрос к API с заданными заголовками.
+    Повторный запрос в пределах API_CACHE_TTL отдаётся из кэша,
+    после него API спрашивают с условными заголовками.
+    """
+    key = (headers['Authorization'], current_timestamp)
+    cached = API_CACHE.get_fresh(key)
+    if cached is not None:
+        return cached
+    response, data = send_api_request(
+        headers, current_timestamp, API_CACHE.validators(key)
+    )
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        cached = API_CACHE.revalidate(key)
+        if cached is not None:
+            return cached
+    response_json = decode_response(response)
+    check_service_denial(response_json, data)
     if response.status_code != 200:
         raise ResponseException(
             GET_API_ANSWER_RESPONSE_ERROR.format(response.status_code, **data)
         )
+    response_headers = getattr(response, 'headers', {})
+    API_CACHE.store(
+        key, response_json,
+        etag=response_headers.get('ETag'),
+        last_modified=response_headers.get('Last-Modified'),
+    )
     return response_json
 
 
+def decode_response(response):
+    """Функция разбирает тело ответа API.
+    При запущенном пуле процессов большой ответ разбирается в нём
+    вместе с построением записей работ, поток запроса ждёт результат.
+    Если пул сломался, ответ разбирается в потоке запроса.
+    """
+    content = getattr(response, 'content', None)
+    if (CPU_POOL is None or not isinstance(content, bytes)
+            or len(content) < CPU_POOL_MIN_BYTES):
+        return decode_json(response)
+    try:
+        return CPU_POOL.submit(
+            decode_payload, content, tuple(HOMEWORK_VERDICTS)
+        ).result()
+    except BrokenProcessPool as error:
+        logging.warning(CPU_POOL_BROKEN_LOG.format(error))
+        return decode_json(response)
+
+
+def make_cpu_pool():
+    """Функция запускает пул процессов разбора при CPU_WORKERS > 0."""
+    if not CPU_WORKERS:
+        return None
+    return BatchExecutor(CPU_WORKERS, CPU_BATCH_SIZE, CPU_BATCH_DELAY)
+
+
+@metrics.instrument('get_api_answer')
+def open_history_stream(practicum_token, current_timestamp):
+    """Функция запрашивает историю работ для потокового разбора.
+    Возвращает открытый ответ и параметры запроса, закрыть ответ
+    должен вызывающий. Ответ с ошибкой закрывается здесь.
+    """
+    headers = practicum_headers(practicum_token)
+    response, data = send_api_request(headers, current_timestamp, stream=True)
+    if response.status_code != 200:
+        with closing(response):
+            check_service_denial(decode_json(response), data)
+        raise ResponseException(
+            GET_API_ANSWER_RESPONSE_ERROR.format(response.status_code, **data)
+        )
+    return response, data
+
+
+@metrics.instrument('check_response')
 def check_response(response):
     """Функция проверяет ответ от API на корректность.
     Возвращает список домашних работ при корректном ответе API.
     """
-    if not isinstance(response, dict):
-        raise TypeError(TYPE_ERROR_DICT.format(type(response)))
-    if 'homeworks' not in response:
-        raise KeyError(KEY_ERROR)
-    homeworks = response['homeworks']
-    if not isinstance(homeworks, list):
-        raise TypeError(TYPE_ERROR_LIST.format(type(homeworks)))
-    return homeworks
+    return homeworks_list(response)
 
 
+@metrics.instrument('parse_status')
 def parse_status(homework):
     """Функция определяет статус работы отправленной на код-ревью."""
-    name = homework['homework_name']
-    status = homework['status']
-    if status not in HOMEWORK_VERDICTS:
-        raise ValueError(KEY_ERROR.format(status))
-    return PARSE_STATUS_RETURN.format(name, HOMEWORK_VERDICTS[status])
+    return render_status(Homework.from_dict(homework, HOMEWORK_VERDICTS))
 
 
-def main():
-    """Функция запуска Телеграм-бота."""
-    if not check_tokens():
-        return
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = 0
-    last_message = ''
-    while True:
+@metrics.instrument('check_response')
+def parse_response(response):
+    """Функция за один проход проверяет ответ API и строит записи работ.
+    Заменяет check_response в цикле опроса и учитывается под его именем.
+    """
+    return parse_homeworks(response, HOMEWORK_VERDICTS)
+
+
+@metrics.instrument('parse_status')
+def status_message(homework, tenant=None):
+    """Функция возвращает сообщение о статусе проверенной записи работы.
+    Заменяет parse_status в цикле опроса и учитывается под его именем.
+    """
+    return render_status(homework, tenant)
+
+
+def render_status(homework, tenant=None):
+    """Функция выбирает шаблон сообщения о статусе работы.
+    Язык, разметка и свои тексты вердиктов берутся из подписки.
+    """
+    if tenant is None:
+        return TEMPLATES.render(homework.homework_name, homework.status)
+    return TEMPLATES.render(
+        homework.homework_name, homework.status,
+        tenant.locale, tenant.parse_mode, tenant.verdicts
+    )
+
+
+def is_new_status(homework, statuses):
+    """Функция проверяет, что статус работы ещё не доставлялся.
+    Индекс statuses хранит пару (status, date_updated) по ключу работы.
+    Если дата изменения неизвестна, например в присланном событии,
+    сравниваются только статусы.
+    """
+    delivered = statuses.get(homework.key)
+    if delivered is None:
+        return True
+    status, date_updated = delivered
+    if date_updated is None or homework.date_updated is None:
+        return status != homework.status
+    return delivered != [homework.status, homework.date_updated]
+
+
+def remember_status(homework, statuses):
+    """Функция заносит доставленный статус работы в индекс."""
+    statuses[homework.key] = [homework.status, homework.date_updated]
+
+
+def combine_messages(updates):
+    """Генератор объединяет сообщения о работах в пакеты.
+    updates - итерируемые пары (работа, сообщение). Каждый пакет
+    укладывается в предел длины сообщения Telegram и содержит свои
+    работы. Пакет выдаётся, как только заполнен.
+    """
+    homeworks, messages, length = [], [], 0
+    for homework, message in updates:
+        extra = len(message) + len(MESSAGE_SEPARATOR) * bool(messages)
+        if messages and length + extra > MESSAGE_MAX_LENGTH:
+            yield homeworks, MESSAGE_SEPARATOR.join(messages)
+            homeworks, messages, length = [], [], 0
+            extra = len(message)
+        homeworks.append(homework)
+        messages.append(message)
+        length += extra
+    if messages:
+        yield homeworks, MESSAGE_SEPARATOR.join(messages)
+
+
+def is_first_contact(tenant):
+    """Функция проверяет, что подписка ещё не получала ответов API."""
+    return not tenant.timestamp and not tenant.statuses
+
+
+def new_update(homework, tenant, first_contact, first):
+    """Функция возвращает сообщение о новом для подписки статусе или None.
+    При первом опросе подписки сообщается только первая работа ответа
+    с последним статусом, остальная история заносится в индекс
+    без уведомлений.
+    """
+    if first_contact and not first:
+        if homework.key not in tenant.statuses:
+            remember_status(homework, tenant.statuses)
+        return None
+    if is_new_status(homework, tenant.statuses):
+        return status_message(homework, tenant)
+    return None
+
+
+def new_updates(homeworks, tenant):
+    """Генератор пар (работа, сообщение) для ещё не доставленных статусов."""
+    first_contact = is_first_contact(tenant)
+    for index, homework in enumerate(homeworks):
+        message = new_update(homework, tenant, first_contact, index == 0)
+        if message is not None:
+            yield homework, message
+
+
+def collect_updates(homeworks, tenants):
+    """Функция за один проход раскладывает новые статусы по подпискам.
+    Хранятся только новые для подписок статусы, а не вся история.
+    """
+    first_contacts = [is_first_contact(tenant) for tenant in tenants]
+    updates = [[] for _ in tenants]
+    for index, homework in enumerate(homeworks):
+        for tenant, first_contact, tenant_updates in zip(
+            tenants, first_contacts, updates
+        ):
+            message = new_update(homework, tenant, first_contact, index == 0)
+            if message is not None:
+                tenant_updates.append((homework, message))
+    return updates
+
+
+def sender(bot):
+    """Функция возвращает отправку сообщения через бота или Outbox."""
+    if isinstance(bot, Outbox):
+        return bot.put
+    return partial(send_to_chat, bot)
+
+
+def deliver_updates(send, tenant, updates):
+    """Функция отправляет новые статусы пакетами и отмечает доставленные.
+    Возвращает признак доставки всех пакетов.
+    """
+    for batch, message in combine_messages(updates):
+        if not send(tenant.chat_id, message, tenant.parse_mode):
+            return False
+        for homework in batch:
+            remember_status(homework, tenant.statuses)
+    return True
+
+
+def poll_history(bot, tenants):
+    """Функция опрашивает API с потоковым разбором ответа.
+    tenants - подписки разных чатов на один токен. Работы разбираются
+    по мере чтения ответа, в памяти остаются только новые для подписок
+    статусы, поэтому память не зависит от длины истории. Ответ
+    закрывается до отправки сообщений. Возвращает итог опроса.
+    """
+    response, data = open_history_stream(
+        tenants[0].practicum_token, min(tenant.timestamp for tenant in tenants)
+    )
+    with closing(response):
+        stream = HomeworkStream(response.iter_content(STREAM_CHUNK_SIZE))
+        homeworks = (
+            Homework.from_dict(item, HOMEWORK_VERDICTS, index)
+            for index, item in enumerate(stream)
+        )
         try:
-            response = get_api_answer(timestamp)
-            homeworks = check_response(response)
-            if homeworks:
-                message = parse_status(homeworks[0])
-                if send_message(bot, message):
-                    timestamp = response.get(
-                        'current_date', timestamp)
-            else:
-                logging.debug(NO_NEW_STATUS_IN_API)
-        except Exception as error:
-            message = MAIN_EXCEPTION_MESSAGE.format(error)
-            logging.error(message)
-            if message != last_message:
-                if send_message(bot, message):
-                    last_message = message
+            updates = collect_updates(homeworks, tenants)
+        except MissingFieldError:
+            check_service_denial(stream.fields, data)
+            raise
+    check_service_denial(stream.fields, data)
+    send = sender(bot)
+    outcomes = []
+    for tenant, tenant_updates in zip(tenants, updates):
+        if not deliver_updates(send, tenant, tenant_updates):
+            outcomes.append(POLL_UNDELIVERED)
+            continue
+        tenant.timestamp = stream.fields.get('current_date', tenant.timestamp)
+        outcomes.append(POLL_UPDATED if tenant_updates else POLL_EMPTY)
+    return combine_outcomes(outcomes)
+
+
+def load_subscriptions():
+    """Функция возвращает список подписок для опроса.
+    Без файла подписок бот обслуживает токен из окружения и чаты,
+    перечисленные в TELEGRAM_CHAT_ID. Язык, разметка и вердикты
+    подписок из файла проверяются по шаблонам при загрузке.
+    """
+    if SUBSCRIPTIONS_FILE:
+        return load_tenants(SUBSCRIPTIONS_FILE, TEMPLATES)
+    return [
+        Tenant(PRACTICUM_TOKEN, chat_id)
+        for chat_id in split_chat_ids(TELEGRAM_CHAT_ID)
+    ]
+
+
+async def get_api_answer_async(practicum_token, current_timestamp):
+    """Корутина запроса к API Практикум.Домашка.
+    Блокирующий запрос выполняется в пуле потоков цикла событий.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, get_tenant_answer, practicum_token, current_timestamp
+    )
+
+
+async def parse_response_async(response):
+    """Корутина проверки ответа API и разбора работ в записи."""
+    return parse_response(response)
+
+
+async def send_message_async(bot, chat_id, message, parse_mode=None):
+    """Корутина отправки сообщения в чат.
+    bot - бот Telegram или очередь исходящих Outbox. Из очереди
+    сообщение отправят её потоки, опрос их не ждёт.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, sender(bot), chat_id, message, parse_mode
+    )
+
+
+async def deliver_updates_async(bot, tenant, updates):
+    """Корутина отправляет новые статусы пакетами и отмечает доставленные.
+    Возвращает False, если хотя бы один пакет не отправлен.
+    """
+    for batch, message in combine_messages(updates):
+        if not await send_message_async(
+            bot, tenant.chat_id, message, tenant.parse_mode
+        ):
+            return False
+        for homework in batch:
+            remember_status(homework, tenant.statuses)
+    return True
+
+
+async def deliver_homeworks_async(bot, tenant, homeworks, response):
+    """Корутина доставляет подписке новые для неё статусы из ответа.
+    Возвращает итог опроса для подписки.
+    """
+    updates = list(new_updates(homeworks, tenant))
+    if not await deliver_updates_async(bot, tenant, updates):
+        return POLL_UNDELIVERED
+    tenant.timestamp = response.get('current_date', tenant.timestamp)
+    return POLL_UPDATED if updates else POLL_EMPTY
+
+
+def combine_outcomes(outcomes):
+    """Функция сводит итоги подписок одного токена в итог опроса.
+    Недоставленные сообщения важнее новых статусов.
+    """
+    for outcome in (POLL_UNDELIVERED, POLL_UPDATED):
+        if outcome in outcomes:
+            return outcome
+    return POLL_EMPTY
+
+
+async def poll_answer_async(bot, tenants):
+    """Корутина опроса API с разбором ответа целиком.
+    tenants - подписки разных чатов на один токен. Ответ запрашивается
+    и разбирается один раз, новые статусы рассылаются по чатам
+    одновременно. Одинаковые сообщения берутся из кэша шаблонов.
+    """
+    response = await get_api_answer_async(
+        tenants[0].practicum_token,
+        min(tenant.timestamp for tenant in tenants)
+    )
+    homeworks = await parse_response_async(response)
+    outcome = combine_outcomes(await asyncio.gather(*(
+        deliver_homeworks_async(bot, tenant, homeworks, response)
+        for tenant in tenants
+    )))
+    if outcome == POLL_EMPTY:
+        logging.debug(NO_NEW_STATUS_IN_API)
+    return outcome
+
+
+async def report_error_async(bot, tenant, error):
+    """Корутина сообщает в чат подписки об ошибке опроса.
+    Повторы ошибки с тем же отпечатком в течение ERROR_WINDOW
+    не отправляются, а попадают в сводку чата. Сообщение, совпадающее
+    с последним отправленным, не повторяется и после перезапуска.
+    """
+    if isinstance(error, RateLimited):
+        tenant.retry_after = error.retry_after
+    message = MAIN_EXCEPTION_MESSAGE.format(error)
+    if ERRORS.record(tenant.chat_id, error) and (
+        message != tenant.last_message
+    ):
+        if await send_message_async(bot, tenant.chat_id, message):
+            tenant.last_message = message
+
+
+async def send_digests_async(bot):
+    """Корутина рассылает сводки ошибок, чьё окно истекло.
+    Сводка по всему процессу без чата пишется в журнал.
+    """
+    for chat_id, message in ERRORS.digest().items():
+        if chat_id is None:
+            logging.warning(message)
+        else:
+            await send_message_async(bot, chat_id, message)
+
+
+async def poll_tenants_async(bot, tenants, store=None):
+    """Корутина одного цикла опроса API для чатов одного токена.
+    Ответ на from_date=0 при STREAM_HISTORY разбирается потоком.
+    После удачного опроса последняя ошибка забывается. Изменившееся
+    состояние подписок сохраняется в store.
+    Возвращает итог опроса для планировщика.
+    """
+    states = [tenant.to_state() for tenant in tenants]
+    loop = asyncio.get_running_loop()
+    try:
+        if STREAM_HISTORY and not min(
+            tenant.timestamp for tenant in tenants
+        ):
+            outcome = await loop.run_in_executor(
+                None, poll_history, bot, tenants
+            )
+        else:
+            outcome = await poll_answer_async(bot, tenants)
+        for tenant in tenants:
+            tenant.last_message = ''
+    except Exception as error:
+        outcome = POLL_ERROR
+        if ERRORS.record(None, error):
+            logging.error(MAIN_EXCEPTION_MESSAGE.format(error))
+        else:
+            logging.debug(MAIN_EXCEPTION_MESSAGE.format(error))
+        await asyncio.gather(*(
+            report_error_async(bot, tenant, error) for tenant in tenants
+        ))
+    for tenant, state in zip(tenants, states):
+        await save_state_async(store, tenant, state)
+    return outcome
+
+
+async def poll_tenant_async(bot, tenant, store=None):
+    """Корутина одного цикла опроса API для подписки."""
+    return await poll_tenants_async(bot, [tenant], store)
+
+
+async def save_state_async(store, tenant, state):
+    """Корутина сохраняет состояние подписки, если оно изменилось."""
+    if store is not None and tenant.to_state() != state:
+        await asyncio.get_running_loop().run_in_executor(
+            None, store.put, tenant.key, tenant.to_state()
+        )
+
+
+async def ingest_tenant_async(bot, tenant, homeworks, store=None):
+    """Корутина доставляет статусы из присланного события.
+    Уже доставленные статусы не повторяются. from_date подписки
+    не меняется: опрос остаётся сверкой на случай пропущенных событий.
+    """
+    state = tenant.to_state()
+    updates = list(new_updates(homeworks, tenant))
+    await deliver_updates_async(bot, tenant, updates)
+    await save_state_async(store, tenant, state)
+    return POLL_UPDATED if updates else POLL_EMPTY
+
+
+def restore_state(tenants, store):
+    """Функция восстанавливает состояние подписок из хранилища."""
+    for tenant in tenants:
+        state = store.get(tenant.key)
+        if state is not None:
+            tenant.apply_state(state)
+
+
+def carry_state(previous, tenants, store=None):
+    """Функция переносит состояние подписок из прежнего списка в новый.
+    Состояние подписок, которых не было в прежнем списке,
+    восстанавливается из store.
+    """
+    by_key = {tenant.key: tenant for tenant in previous}
+    fresh = []
+    for tenant in tenants:
+        if tenant.key in by_key:
+            tenant.adopt(by_key[tenant.key])
+        else:
+            fresh.append(tenant)
+    if store is not None:
+        restore_state(fresh, store)
+
+
+def file_version(path):
+    """Функция возвращает время изменения файла или None без файла."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+async def poll_all_async(bot, tenants, concurrency=POLL_CONCURRENCY,
+                         store=None):
+    """Корутина опрашивает все подписки одновременно.
+    Каждый токен опрашивается один раз для всех своих чатов.
+    Число запросов в полёте ограничено concurrency.
+    Возвращает итоги опросов токенов.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def poll(group):
+        async with semaphore:
+            return await poll_tenants_async(bot, group, store)
+
+    return await asyncio.gather(*(
+        poll(group) for group in group_by_token(tenants).values()
+    ))
+
+
+async def poll_once_async(bot, tenants, store=None, shard=None):
+    """Корутина одного цикла опроса всех подписок для запуска по расписанию.
+    С shard опрашиваются только токены, аренду которых удалось взять,
+    их состояние перед опросом читается из store.
+    Возвращает итоги опросов токенов.
+    """
+    loop = asyncio.get_running_loop()
+    set_poll_executor(loop)
+    if shard is not None:
+        await loop.run_in_executor(None, shard.refresh)
+        tenants = [
+            tenant
+            for key, group in group_by_token(tenants).items()
+            if await loop.run_in_executor(None, shard.claim, key)
+            for tenant in group
+        ]
+        if store is not None:
+            await loop.run_in_executor(None, restore_state, tenants, store)
+    outcomes = await poll_all_async(bot, tenants, store=store)
+    logging.info(ONCE_FINISHED_LOG.format(
+        len(outcomes), outcomes.count(POLL_ERROR),
+        outcomes.count(POLL_UNDELIVERED)
+    ))
+    return outcomes
+
+
+class Poller:
+    """Опрос подписок по очереди с ближайшим временем срабатывания.
+    Подписки одного токена опрашиваются вместе, как одна группа.
+    Первые опросы распределены по RETRY_TIME, следующие назначает
+    политика интервалов по первой подписке группы. lag копит
+    опоздание опросов. Раз в ERROR_DIGEST_INTERVAL рассылаются
+    готовые сводки ошибок. События
+    приёмника доставляются в том же цикле событий, в котором создан
+    Poller; опрос и событие одного токена не выполняются одновременно.
+    С shard опрашиваются только токены доли обработчика, состояние
+    их подписок перед опросом читается из общего store.
+    load перечитывает список подписок для reload, при заданном watch
+    список перечитывается и при изменении этого файла. После stop
+    сначала останавливается приёмник событий receiver, новые опросы
+    не начинаются, а начатые опросы и доставка принятых событий
+    получают долю SHUTDOWN_POLLS_SHARE от SHUTDOWN_TIMEOUT
+    на завершение и сохранение состояния. stopped_at - момент stop.
+    """
+
+    def __init__(self, bot, tenants, store=None, policy=None,
+                 concurrency=POLL_CONCURRENCY, shard=None, load=None,
+                 watch=None):
+        """Метод группирует подписки по токенам для опроса."""
+        self.bot = bot
+        self.store = store
+        self.shard = shard
+        self.load = load
+        self.watch = watch
+        self.policy = policy or AdaptivePolicy.from_env(RETRY_TIME)
+        self.groups = group_by_token(tenants)
+        self.loop = asyncio.get_running_loop()
+        self._locks = {key: asyncio.Lock() for key in self.groups}
+        self.queue = PollQueue()
+        self.lag = LagStats()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._reload_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._receiving = threading.Lock()
+        self.receiver = None
+        self.stopped_at = None
+        self._tasks = set()
+        self._background = []
+
+    def _lock(self, key):
+        return self._locks.setdefault(key, asyncio.Lock())
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _claim(self, key):
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, self.shard.claim, key):
+            return False
+        if self.store is not None:
+            await loop.run_in_executor(
+                None, restore_state, self.groups.get(key, []), self.store
+            )
+        return True
+
+    async def _poll(self, key, due):
+        if self.shard is not None and not await self._claim(key):
+            if key in self.groups:
+                self.schedule(key, time.monotonic() + self.shard.lease_ttl)
+            return
+        async with self._semaphore, self._lock(key):
+            tenants = self.groups.get(key)
+            if tenants is None:
+                return
+            lag = time.monotonic() - due
+            self.lag.observe(lag)
+            SCHEDULER_LAG.observe(max(lag, 0.0))
+            try:
+                outcome = await poll_tenants_async(
+                    self.bot, tenants, self.store
+                )
+            except Exception as error:
+                logging.error(POLL_FAILED_LOG.format(key, error))
+                outcome = POLL_ERROR
+        POLLS.inc(outcome)
+        if key in self.groups and not self._stopping:
+            self.schedule(
+                key, time.monotonic()
+                + self.policy.next_delay(tenants[0], outcome)
+            )
+
+    async def _ingest(self, key, homeworks):
+        async with self._lock(key):
+            outcomes = await asyncio.gather(*(
+                ingest_tenant_async(self.bot, tenant, homeworks, self.store)
+                for tenant in self.groups.get(key, ())
+            ))
+        WEBHOOK_EVENTS.inc(
+            POLL_UPDATED if POLL_UPDATED in outcomes else POLL_EMPTY
+        )
+
+    def receive(self, practicum_token, response):
+        """Метод принимает событие из потока приёмника.
+        Событие проверяется сразу, чтобы приёмник ответил 400 на
+        неверное тело, а доставка выполняется в цикле событий
+        и учитывается при остановке. После stop события не принимаются.
+        """
+        key = token_key(practicum_token)
+        if key not in self.groups:
+            raise UnknownSubscription(UNKNOWN_SUBSCRIPTION_ERROR)
+        homeworks = parse_response(response)
+        with self._receiving:
+            if self._stopping:
+                raise ShuttingDown(SHUTTING_DOWN_ERROR)
+            self.loop.call_soon_threadsafe(
+                self._spawn, self._ingest(key, homeworks)
+            )
+
+    async def reload(self):
+        """Корутина перечитывает список подписок и применяет изменения.
+        Новые токены опрашиваются сразу, снятые убираются из очереди,
+        опрос не перезапускается. Подписки переносят накопленное
+        состояние, новые читают его из store. Если список не прочитан,
+        остаётся прежний.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._reload_lock:
+            try:
+                groups = group_by_token(
+                    await loop.run_in_executor(None, self.load)
+                )
+            except Exception as error:
+                logging.error(SUBSCRIPTIONS_RELOAD_ERROR.format(error))
+                return
+            removed = self.groups.keys() - groups.keys()
+            added = groups.keys() - self.groups.keys()
+            for key in removed:
+                async with self._lock(key):
+                    del self.groups[key]
+                    self._locks.pop(key)
+                self.queue.remove(key)
+                if self.shard is not None:
+                    await loop.run_in_executor(None, self.shard.release, key)
+            for key, tenants in groups.items():
+                async with self._lock(key):
+                    await loop.run_in_executor(
+                        None, carry_state, self.groups.get(key, ()),
+                        tenants, self.store
+                    )
+                    self.groups[key] = tenants
+                if key in added:
+                    self.schedule(key, time.monotonic())
+        logging.info(SUBSCRIPTIONS_RELOADED.format(
+            len(added), len(removed), len(self.groups)
+        ))
+
+    def request_reload(self):
+        """Метод запускает перечитывание подписок, например по SIGHUP."""
+        if self.load is not None and not self._stopping:
+            self._spawn(self.reload())
+
+    def stop(self):
+        """Метод останавливает цикл опроса, например по SIGTERM.
+        Опросы, ждущие места в очереди исходящих, ждут не дольше
+        своей доли времени на остановку.
+        """
+        with self._receiving:
+            self._stopping = True
+        if self.stopped_at is None:
+            self.stopped_at = time.monotonic()
+        if isinstance(self.bot, Outbox):
+            self.bot.limit_puts(self.drain_deadline())
+        self._wakeup.set()
+
+    def drain_deadline(self):
+        """Метод возвращает срок завершения начатых опросов."""
+        return self.stopped_at + SHUTDOWN_TIMEOUT * SHUTDOWN_POLLS_SHARE
+
+    async def _watch_subscriptions(self):
+        version = file_version(self.watch)
+        while True:
+            await asyncio.sleep(SUBSCRIPTIONS_WATCH_INTERVAL)
+            current = file_version(self.watch)
+            if current != version:
+                version = current
+                await self.reload()
+
+    async def _drain(self):
+        if self.receiver is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, webhook.stop_http_server, self.receiver
+            )
+            self.receiver = None
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(
+            self._tasks,
+            timeout=max(self.drain_deadline() - time.monotonic(), 0),
+        )
+        if pending:
+            logging.warning(SHUTDOWN_TIMEOUT_LOG.format(
+                SHUTDOWN_TIMEOUT * SHUTDOWN_POLLS_SHARE, len(pending)
+            ))
+            for task in pending:
+                task.cancel()
+
+    async def _refresh_shard(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.shard.refresh_interval)
+            await loop.run_in_executor(None, self.shard.refresh)
+
+    async def _send_digests(self):
+        while True:
+            await asyncio.sleep(ERROR_DIGEST_INTERVAL)
+            await send_digests_async(self.bot)
+
+    def schedule(self, key, due):
+        """Метод назначает опрос группы подписок токена и будит цикл."""
+        self.queue.add(key, due)
+        self._wakeup.set()
+
+    async def run(self):
+        """Корутина цикла опроса подписок до вызова stop."""
+        background = [self._send_digests()]
+        if self.shard is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.shard.refresh
+            )
+            background.append(self._refresh_shard())
+        if self.watch and self.load is not None and (
+            SUBSCRIPTIONS_WATCH_INTERVAL
+        ):
+            background.append(self._watch_subscriptions())
+        self._background = [
+            asyncio.create_task(coroutine) for coroutine in background
+        ]
+        self.queue.stagger(self.groups, RETRY_TIME, time.monotonic())
+        while not self._stopping:
+            for key, due in self.queue.pop_due(time.monotonic()):
+                self._spawn(self._poll(key, due))
+            next_due = self.queue.next_due()
+            timeout = None
+            if next_due is not None:
+                timeout = max(next_due - time.monotonic(), 0)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        await self._drain()
+
+
+def handle_signal(poller, signum):
+    """Функция обработки сигнала процесса.
+    SIGHUP перечитывает подписки, остальные сигналы останавливают опрос.
+    """
+    logging.info(SIGNAL_LOG.format(signal.Signals(signum).name))
+    if signum == signal.SIGHUP:
+        poller.request_reload()
+    else:
+        poller.stop()
+
+
+def set_poll_executor(loop):
+    """Функция задаёт циклу событий пул потоков на POLL_CONCURRENCY.
+    Блокирующие запросы к API и Telegram выполняются в нём,
+    пул по умолчанию ограничил бы их числом процессоров.
+    Возвращает пул.
+    """
+    executor = ThreadPoolExecutor(max_workers=POLL_CONCURRENCY)
+    loop.set_default_executor(executor)
+    return executor
+
+
+async def polling_loop(bot, tenants, store=None, shard=None):
+    """Корутина цикла опроса подписок до SIGTERM или SIGINT.
+    Возвращает остановленный Poller. Пул потоков закрывается без
+    ожидания: зависшие после остановки запросы уже не нужны.
+    """
+    loop = asyncio.get_running_loop()
+    executor = set_poll_executor(loop)
+    interval = RECONCILE_INTERVAL if WEBHOOK_PORT else RETRY_TIME
+    poller = Poller(
+        bot, tenants, store, AdaptivePolicy.from_env(interval), shard=shard,
+        load=load_subscriptions, watch=SUBSCRIPTIONS_FILE,
+    )
+    signals = (signal.SIGTERM, signal.SIGINT, signal.SIGHUP)
+    for signum in signals:
+        loop.add_signal_handler(signum, handle_signal, poller, signum)
+    if WEBHOOK_PORT:
+        poller.receiver = webhook.start_http_server(
+            poller.receive, WEBHOOK_PORT, WEBHOOK_HOST, WEBHOOK_SECRET
+        )
+    try:
+        await poller.run()
+    finally:
+        for signum in signals:
+            loop.remove_signal_handler(signum)
+        if poller.receiver is not None:
+            webhook.stop_http_server(poller.receiver)
+        executor.shutdown(wait=False, cancel_futures=True)
+    return poller
+
+
+def run_until_stopped(coroutine):
+    """Функция выполняет корутину в новом цикле событий.
+    В отличие от asyncio.run не ждёт потоков пула цикла, поэтому
+    зависший запрос не задерживает отправку очереди исходящих
+    и сохранение состояния дольше SHUTDOWN_TIMEOUT.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        try:
+            loop.run_until_complete(cancel_tasks())
+            loop.run_until_complete(loop.shutdown_asyncgens())
         finally:
-            time.sleep(RETRY_TIME)
+            loop.close()
+
+
+async def cancel_tasks():
+    """Корутина отменяет остальные задачи цикла и ждёт их завершения."""
+    tasks = asyncio.all_tasks() - {asyncio.current_task()}
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def once_exit_code(outcomes):
+    """Функция возвращает код выхода однократного опроса.
+    При ошибке опроса или недоставленных сообщениях хотя бы одного
+    токена - EX_TEMPFAIL, чтобы планировщик повторил запуск.
+    """
+    if POLL_ERROR in outcomes or POLL_UNDELIVERED in outcomes:
+        return os.EX_TEMPFAIL
+    return os.EX_OK
+
+
+def poll_tenant(bot, tenant):
+    """Функция выполняет один цикл опроса API для подписки."""
+    asyncio.run(poll_tenant_async(bot, tenant))
+
+
+def make_outbox(bot):
+    """Функция создаёт очередь исходящих сообщений бота."""
+    return Outbox(
+        partial(send_to_chat, bot, defer=True),
+        maxsize=OUTBOX_SIZE,
+        workers=OUTBOX_WORKERS,
+        attempts=OUTBOX_ATTEMPTS,
+        backoff=OUTBOX_BACKOFF,
+        dead_letter_path=DEAD_LETTER_FILE,
+        coalesce=OUTBOX_COALESCE,
+        separator=MESSAGE_SEPARATOR,
+        max_length=MESSAGE_MAX_LENGTH,
+    )
+
+
+def open_shard(store):
+    """Функция создаёт долю подписок обработчика при SHARDING=1.
+    Аренды хранятся в той же базе SQLite, что и состояние подписок.
+    Без деления подписок возвращает None.
+    """
+    if not SHARDING:
+        return None
+    return Shard(SqliteLeases(store.path), WORKER_ID, SHARD_LEASE_TTL)
+
+
+def close_shard(shard):
+    """Функция отдаёт ключи обработчика остальным при остановке."""
+    if shard is not None:
+        shard.leave()
+        shard.leases.close()
+
+
+def parse_args(argv=None):
+    """Функция разбирает параметры командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--once', action='store_true', help=ONCE_HELP)
+    return parser.parse_args(argv)
+
+
+def run_once(bot, tenants, store, shard):
+    """Функция выполняет один цикл опроса и возвращает код выхода.
+    Сообщения отправляются напрямую, без очереди исходящих: from_date
+    подписки сдвигается, только если её сообщения доставлены.
+    """
+    return once_exit_code(
+        asyncio.run(poll_once_async(bot, tenants, store, shard))
+    )
+
+
+def bind_gauges(outbox):
+    """Функция связывает показатели с очередью, выключателями и кэшем."""
+    LOG_DROPPED.set_function(dropped_records)
+    OUTBOX_DEPTH.set_function(outbox.__len__)
+    for breaker in (PRACTICUM_BREAKER, TELEGRAM_BREAKER):
+        CIRCUIT_STATE.set_function(
+            lambda breaker=breaker: STATE_CODES[breaker.state], breaker.name
+        )
+        CIRCUIT_REJECTED.set_function(
+            lambda breaker=breaker: breaker.rejected, breaker.name
+        )
+    for result in ('hits', 'misses', 'revalidated'):
+        API_CACHE_REQUESTS.set_function(
+            lambda result=result: API_CACHE.stats()[result], result
+        )
+    API_CACHE_ENTRIES.set_function(lambda: API_CACHE.stats()['size'])
+
+
+def run_forever(bot, tenants, store, shard):
+    """Функция опроса подписок через очередь исходящих до остановки.
+    Очередь получает остаток SHUTDOWN_TIMEOUT после завершения
+    опросов, оставшиеся сообщения пишутся в файл недоставленных.
+    """
+    outbox = make_outbox(bot)
+    bind_gauges(outbox)
+    if METRICS_PORT:
+        metrics.start_http_server(METRICS_PORT, METRICS_HOST)
+    outbox.start()
+    stopped_at = None
+    try:
+        stopped_at = run_until_stopped(
+            polling_loop(outbox, tenants, store, shard)
+        ).stopped_at
+    finally:
+        outbox.stop(shutdown_time_left(stopped_at))
+    return os.EX_OK
+
+
+def shutdown_time_left(stopped_at):
+    """Функция возвращает остаток общего времени на остановку.
+    Без сигнала остановки, например при сбое, - всё время.
+    """
+    if stopped_at is None:
+        return SHUTDOWN_TIMEOUT
+    return max(stopped_at + SHUTDOWN_TIMEOUT - time.monotonic(), 0)
+
+
+def main(argv=None):
+    """Функция запуска Телеграм-бота.
+    С --once выполняет один цикл опроса и завершается.
+    Возвращает код выхода процесса.
+    """
+    global CPU_POOL
+    args = parse_args(argv)
+    if not check_tokens():
+        return os.EX_CONFIG
+    bot = transport.make_bot(TELEGRAM_TOKEN)
+    tenants = load_subscriptions()
+    logging.info(SUBSCRIPTIONS_LOADED.format(len(tenants)))
+    store = open_store(STATE_STORE, STATE_FLUSH_INTERVAL)
+    if SHARDING and not isinstance(store, SqliteStateStore):
+        logging.critical(SHARDING_STORE_CRITICAL_LOG.format(STATE_STORE))
+        store.close()
+        return os.EX_CONFIG
+    shard = open_shard(store)
+    restore_state(tenants, store)
+    CPU_POOL = make_cpu_pool()
+    run = run_once if args.once else run_forever
+    try:
+        return run(bot, tenants, store, shard)
+    finally:
+        if CPU_POOL is not None:
+            CPU_POOL.shutdown()
+        close_shard(shard)
+        store.close()
 
 
 if __name__ == '__main__':
-    LOG_ATTRIBUTES = ('%(asctime)s, '
-                      '%(levelname)s, '
-                      '%(name)s, '
-                      '%(message)s, '
-                      '%(funcName)s, '
-                      '%(lineno)d')
-    logging.basicConfig(  # Глобальная настройка логов
-        level=logging.DEBUG,
-        handlers=[
-            logging.FileHandler(__file__ + '.log', mode='w'),
-            logging.StreamHandler(sys.stdout)
-        ],
-        format=LOG_ATTRIBUTES
+    log_listener = configure_logging(  # Глобальная настройка логов
+        __file__ + '.log',
+        level=os.getenv('LOG_LEVEL', 'DEBUG'),
+        rotation=os.getenv('LOG_ROTATION', 'size'),
+        max_bytes=int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+        backup_count=int(os.getenv('LOG_BACKUP_COUNT', 5)),
+        when=os.getenv('LOG_ROTATE_WHEN', 'midnight'),
+        json_lines=os.getenv('LOG_FORMAT') == 'json',
     )
-    main()
+    try:
+        exit_code = main()
+    finally:
+        log_listener.stop()
+    sys.exit(exit_code)
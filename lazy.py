@@ -0,0 +1,22 @@
+"""Отложенный импорт тяжёлых зависимостей."""
+
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Функция возвращает модуль, загружаемый при первом обращении.
+    Код модуля выполняется при первом обращении к его атрибуту,
+    уже загруженный модуль возвращается как есть. Подходит только
+    для модулей верхнего уровня: поиск подмодуля загрузил бы
+    родительский пакет сразу.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,119 @@
+"""Настройка журнала: запись в файл и stdout вне потока опроса."""
+
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+LOG_ATTRIBUTES = ('%(asctime)s, '
+                  '%(levelname)s, '
+                  '%(name)s, '
+                  '%(message)s, '
+                  '%(funcName)s, '
+                  '%(lineno)d')
+LOG_ROTATION_ERROR = 'Неизвестный способ ротации журнала: {}'
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматтер записи журнала в одну строку JSON."""
+
+    def format(self, record):
+        """Метод возвращает запись журнала в виде строки JSON."""
+        entry = dict(
+            time=self.formatTime(record),
+            level=record.levelname,
+            logger=record.name,
+            message=record.getMessage(),
+            function=record.funcName,
+            line=record.lineno,
+        )
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Обработчик очереди, не блокирующий поток при переполнении.
+    Записи ниже WARNING сверх размера очереди отбрасываются
+    и подсчитываются, предупреждения и ошибки ждут места в очереди.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        """Метод готовит запись к выводу в потоке журнала.
+        В отличие от QueueHandler сохраняет exc_info, чтобы форматтер
+        потока вывел исключение сам, например отдельным полем JSON.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        """Метод кладёт запись в очередь или отбрасывает её."""
+        if (record.levelno or logging.NOTSET) >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def dropped_records():
+    """Функция возвращает число отброшенных записей корневого журнала."""
+    return sum(
+        handler.dropped for handler in logging.getLogger().handlers
+        if isinstance(handler, DroppingQueueHandler)
+    )
+
+
+def file_handler(path, rotation, max_bytes, backup_count, when):
+    """Функция создаёт файловый обработчик с ротацией.
+    rotation: size - по размеру файла, time - по времени.
+    """
+    if rotation == 'size':
+        return logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count,
+            encoding='utf-8'
+        )
+    if rotation == 'time':
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=when, backupCount=backup_count, encoding='utf-8'
+        )
+    raise ValueError(LOG_ROTATION_ERROR.format(rotation))
+
+
+def configure_logging(path, level='DEBUG', rotation='size',
+                      max_bytes=10 * 1024 * 1024, backup_count=5,
+                      when='midnight', json_lines=False, queue_size=10000):
+    """Функция настраивает корневой журнал через очередь.
+    Поток, пишущий в журнал, только кладёт запись в очередь, а в файл
+    и stdout её выводит QueueListener в своём потоке. Возвращает
+    запущенный QueueListener, его нужно остановить при выходе.
+    """
+    formatter = JsonFormatter() if json_lines else logging.Formatter(
+        LOG_ATTRIBUTES
+    )
+    handlers = [
+        file_handler(path, rotation, max_bytes, backup_count, when),
+        logging.StreamHandler(sys.stdout),
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.Queue(queue_size)
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    listener.start()
+    return listener
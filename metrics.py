@@ -0,0 +1,239 @@
+"""Метрики бота в текстовом формате Prometheus."""
+
+import functools
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+METRICS_PATH = '/metrics'
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{_escape(value)}"' for name, value in pairs
+    ) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Набор метрик, отдаваемых на /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Метод добавляет метрику в набор."""
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Метод возвращает все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(),
+                 registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        """Метод увеличивает счётчик с метками labels."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        """Метод возвращает значение счётчика."""
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def samples(self):
+        """Метод возвращает строки значений."""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+            for labels, value in values
+        ]
+
+
+class Gauge(_Metric):
+    """Текущее значение, заданное явно или функцией."""
+
+    kind = 'gauge'
+
+    def set(self, value, *labels):
+        """Метод задаёт значение показателя."""
+        with self._lock:
+            self._values[labels] = value
+
+    def set_function(self, function, *labels):
+        """Метод задаёт функцию, вычисляющую значение при выдаче."""
+        with self._lock:
+            self._values[labels] = function
+
+    def samples(self):
+        """Метод возвращает строки значений."""
+        with self._lock:
+            values = sorted(self._values.items(), key=lambda item: item[0])
+        return [
+            f'{self.name}{_labels(self.labelnames, labels)} '
+            f'{_number(value() if callable(value) else value)}'
+            for labels, value in values
+        ]
+
+
+class Histogram(_Metric):
+    """Гистограмма длительностей с накопительными корзинами."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, *labels):
+        """Метод учитывает одно наблюдение."""
+        with self._lock:
+            counts, total = self._values.get(
+                labels, ([0] * len(self.buckets), 0.0)
+            )
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[labels] = (counts, total + value)
+
+    def count(self, *labels):
+        """Метод возвращает число наблюдений."""
+        with self._lock:
+            counts, _ = self._values.get(labels, ([0], 0.0))
+            return sum(counts)
+
+    def samples(self):
+        """Метод возвращает строки корзин, суммы и числа наблюдений."""
+        with self._lock:
+            values = sorted(
+                (labels, (list(counts), total))
+                for labels, (counts, total) in self._values.items()
+            )
+        lines = []
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket = _labels(
+                    self.labelnames, labels, [('le', _number(bound))]
+                )
+                lines.append(f'{self.name}_bucket{bucket} {cumulative}')
+            suffix = _labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{suffix} {_number(total)}')
+            lines.append(f'{self.name}_count{suffix} {cumulative}')
+        return lines
+
+
+CALL_DURATION = Histogram(
+    'homework_call_duration_seconds',
+    'Длительность вызовов функций бота',
+    ['function'],
+)
+CALL_ERRORS = Counter(
+    'homework_call_errors_total',
+    'Исключения в функциях бота по классам',
+    ['function', 'error'],
+)
+
+
+def instrument(function_name):
+    """Декоратор учитывает длительность и исключения вызова."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except Exception as error:
+                CALL_ERRORS.inc(function_name, type(error).__name__)
+                raise
+            finally:
+                CALL_DURATION.observe(
+                    time.perf_counter() - started, function_name
+                )
+        return wrapper
+    return decorator
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов к /metrics."""
+
+    registry = REGISTRY
+
+    def log_message(self, *args):
+        """Запросы сборщика метрик не пишутся в журнал."""
+
+    def do_GET(self):
+        """Ответ со всеми метриками набора."""
+        if self.path.split('?')[0] != METRICS_PATH:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_http_server(port, host='127.0.0.1', registry=REGISTRY):
+    """Функция запускает сервер /metrics в фоновом потоке."""
+    handler = type('Handler', (MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
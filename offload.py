@@ -0,0 +1,111 @@
+"""Пакетное выполнение разбора ответов в пуле процессов."""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+POOL_RESTART_LOG = 'Пул процессов разбора сломан и перезапущен: {}'
+
+
+def run_batch(function, batch):
+    """Функция выполняет function для пакета аргументов в процессе пула.
+    Исключения возвращаются вместе с результатами, чтобы ошибка одной
+    задачи не теряла результаты остальных.
+    """
+    results = []
+    for args in batch:
+        try:
+            results.append((True, function(*args)))
+        except Exception as error:
+            results.append((False, error))
+    return results
+
+
+def _resolve(futures, pooled):
+    try:
+        results = pooled.result()
+    except Exception as error:
+        for future in futures:
+            future.set_exception(error)
+        return
+    for future, (succeeded, value) in zip(futures, results):
+        if succeeded:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+
+class BatchExecutor:
+    """Пул процессов, получающий задачи пакетами.
+    Задачи из разных потоков копятся до batch_size штук или max_delay
+    секунд и уходят в пул одним вызовом, поэтому стоимость передачи
+    между процессами делится на пакет. function должна быть функцией
+    уровня модуля. Процессы запускаются через forkserver, чтобы не
+    копировать потоки цикла опроса. Сломанный пул, например после
+    гибели процесса, перезапускается при отправке следующего пакета;
+    задачи, потерянные вместе с ним, завершаются BrokenProcessPool.
+    """
+
+    def __init__(self, workers, batch_size=32, max_delay=0.002,
+                 mp_context=None):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.mp_context = (
+            mp_context or multiprocessing.get_context('forkserver')
+        )
+        self._pool = ProcessPoolExecutor(workers, mp_context=self.mp_context)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def submit(self, function, *args):
+        """Метод ставит задачу в пакет и возвращает её Future."""
+        future = Future()
+        with self._lock:
+            batch = self._pending.setdefault(function, [])
+            batch.append((args, future))
+            if len(batch) >= self.batch_size:
+                self._send(function)
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    def flush(self):
+        """Метод сразу отправляет в пул все накопленные задачи."""
+        with self._lock:
+            self._timer = None
+            for function in list(self._pending):
+                self._send(function)
+
+    def _send(self, function):
+        batch = self._pending.pop(function)
+        futures = [future for _, future in batch]
+        try:
+            pooled = self._submit(function, [args for args, _ in batch])
+        except Exception as error:
+            for future in futures:
+                future.set_exception(error)
+            return
+        pooled.add_done_callback(partial(_resolve, futures))
+
+    def _submit(self, function, batch):
+        try:
+            return self._pool.submit(run_batch, function, batch)
+        except BrokenProcessPool as error:
+            logging.warning(POOL_RESTART_LOG.format(error))
+            self._pool.shutdown(wait=False)
+            self._pool = ProcessPoolExecutor(
+                self.workers, mp_context=self.mp_context
+            )
+            return self._pool.submit(run_batch, function, batch)
+
+    def shutdown(self, wait=True):
+        """Метод отправляет остаток задач и останавливает процессы."""
+        self.flush()
+        self._pool.shutdown(wait)
@@ -0,0 +1,225 @@
+"""Очередь исходящих сообщений Telegram с отдельными отправителями."""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from exceptions import RateLimited
+
+OUTBOX_RETRY_LOG = 'Сообщение в чат {} не отправлено, попытка {} из {}'
+OUTBOX_DEAD_LETTER_LOG = 'Сообщение в чат {} записано в {}: {}'
+OUTBOX_CLOSED_ERROR = 'Очередь исходящих сообщений остановлена'
+OUTBOX_STOP_TIMEOUT_ERROR = 'Сообщение не отправлено до остановки очереди'
+OUTBOX_DEFER_LOG = 'Отправка в чат {} отложена на {:.1f} с: {}'
+DEFER_MIN_WAIT = 0.5
+# Наименьшая пауза отложенной отправки, чтобы не крутиться вхолостую
+
+
+class Outbox:
+    """Ограниченная очередь сообщений и потоки-отправители.
+    Опрос API кладёт сообщения в очередь и не ждёт Telegram. Сообщения
+    одного чата отправляются по порядку и при coalesce склеиваются
+    в одно. Недоставленные после attempts попыток сообщения пишутся
+    в dead_letter_path построчно в JSON. Если send выбрасывает
+    RateLimited, сообщение ждёт retry_after секунд, и это не считается
+    попыткой. После limit_puts места в очереди ждут не дольше срока.
+    """
+
+    def __init__(self, send, maxsize=1000, workers=1, attempts=5,
+                 backoff=1.0, dead_letter_path=None, coalesce=True,
+                 separator='\n\n', max_length=4096):
+        self.send = send
+        self.maxsize = maxsize
+        self.workers = workers
+        self.attempts = attempts
+        self.backoff = backoff
+        self.dead_letter_path = dead_letter_path
+        self.coalesce = coalesce
+        self.separator = separator
+        self.max_length = max_length
+        self._pending = OrderedDict()
+        self._busy = set()
+        self._size = 0
+        self._in_flight = 0
+        self._closed = False
+        self._put_deadline = None
+        self._condition = threading.Condition()
+        self._threads = []
+        self._dead_letter_lock = threading.Lock()
+
+    def __len__(self):
+        """Число сообщений, ожидающих отправки."""
+        with self._condition:
+            return self._size
+
+    def put(self, chat_id, text, parse_mode=None, timeout=None):
+        """Метод ставит сообщение в очередь.
+        При заполненной очереди ждёт освобождения места не дольше
+        timeout и срока limit_puts. Возвращает False, если не дождался.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._closed and self._size >= self.maxsize:
+                limits = [
+                    limit for limit in (end, self._put_deadline)
+                    if limit is not None
+                ]
+                if not limits:
+                    self._condition.wait()
+                    continue
+                left = min(limits) - time.monotonic()
+                if left <= 0:
+                    return False
+                self._condition.wait(left)
+            if self._closed:
+                raise RuntimeError(OUTBOX_CLOSED_ERROR)
+            self._pending.setdefault(chat_id, []).append((text, parse_mode))
+            self._size += 1
+            self._condition.notify_all()
+        return True
+
+    def limit_puts(self, deadline):
+        """Метод ограничивает ожидание места в очереди моментом deadline.
+        Нужен при остановке: пока Telegram недоступен, очередь не
+        освобождается, и опросы не должны ждать её дольше срока.
+        """
+        with self._condition:
+            self._put_deadline = deadline
+            self._condition.notify_all()
+
+    def start(self):
+        """Метод запускает потоки-отправители."""
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f'outbox-{number}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Метод дожидается отправки очереди и останавливает потоки.
+        timeout ограничивает ожидание всех потоков вместе. Сообщения,
+        не взятые в отправку за это время, пишутся в dead_letter_path.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(
+                None if deadline is None
+                else max(deadline - time.monotonic(), 0)
+            )
+        self._threads = []
+        self._spill()
+
+    def _spill(self):
+        with self._condition:
+            pending, self._pending = self._pending, OrderedDict()
+            self._size = 0
+            self._condition.notify_all()
+        error = TimeoutError(OUTBOX_STOP_TIMEOUT_ERROR)
+        for chat_id, items in pending.items():
+            for text, parse_mode in items:
+                self._dead_letter(chat_id, text, parse_mode, error)
+
+    def join(self, timeout=None):
+        """Метод ждёт, пока очередь опустеет и отправки завершатся."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._size and not self._in_flight, timeout
+            )
+
+    def _take(self):
+        with self._condition:
+            while True:
+                for chat_id in self._pending:
+                    if chat_id not in self._busy:
+                        return chat_id, self._pop_texts(chat_id)
+                if self._closed and not self._size:
+                    return None, None
+                self._condition.wait()
+
+    def _pop_texts(self, chat_id):
+        items = self._pending[chat_id]
+        text, parse_mode = items[0]
+        taken = [text]
+        if self.coalesce:
+            length = len(text)
+            for text, mode in items[1:]:
+                length += len(self.separator) + len(text)
+                if mode != parse_mode or length > self.max_length:
+                    break
+                taken.append(text)
+        del items[:len(taken)]
+        if not items:
+            del self._pending[chat_id]
+        self._busy.add(chat_id)
+        self._size -= len(taken)
+        self._in_flight += 1
+        self._condition.notify_all()
+        return parse_mode, taken
+
+    def _work(self):
+        while True:
+            chat_id, taken = self._take()
+            if chat_id is None:
+                return
+            parse_mode, texts = taken
+            try:
+                self._deliver(
+                    chat_id, self.separator.join(texts), parse_mode
+                )
+            finally:
+                with self._condition:
+                    self._busy.discard(chat_id)
+                    self._in_flight -= 1
+                    self._condition.notify_all()
+
+    def _deliver(self, chat_id, text, parse_mode):
+        options = {'parse_mode': parse_mode} if parse_mode else {}
+        attempt = 0
+        while attempt < self.attempts:
+            try:
+                if self.send(chat_id, text, **options):
+                    return
+                error = None
+            except RateLimited as limited:
+                if self._defer(chat_id, limited):
+                    continue
+                error = limited
+                break
+            except Exception as send_error:
+                error = send_error
+            attempt += 1
+            logging.warning(
+                OUTBOX_RETRY_LOG.format(chat_id, attempt, self.attempts)
+            )
+            if attempt < self.attempts:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+        self._dead_letter(chat_id, text, parse_mode, error)
+
+    def _defer(self, chat_id, limited):
+        wait = max(limited.retry_after, DEFER_MIN_WAIT)
+        logging.warning(OUTBOX_DEFER_LOG.format(chat_id, wait, limited))
+        with self._condition:
+            return not self._condition.wait_for(lambda: self._closed, wait)
+
+    def _dead_letter(self, chat_id, text, parse_mode, error):
+        logging.error(
+            OUTBOX_DEAD_LETTER_LOG.format(chat_id, self.dead_letter_path, text)
+        )
+        if not self.dead_letter_path:
+            return
+        record = dict(
+            chat_id=chat_id,
+            text=text,
+            parse_mode=parse_mode,
+            error=repr(error) if error else None,
+            time=time.time(),
+        )
+        with self._dead_letter_lock:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
@@ -0,0 +1,114 @@
+"""Ограничители частоты запросов к API Практикума и Телеграма."""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """Ведро токенов: rate запросов в секунду с запасом capacity.
+    Запрос резервирует токен заранее, поэтому ожидание вычисляется
+    под блокировкой, а спит вызывающий поток уже без неё.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def reserve(self):
+        """Метод занимает токен и возвращает паузу до его получения."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            return max(
+                0.0, -self._tokens / self.rate, self._paused_until - now
+            )
+
+    def acquire(self):
+        """Метод ждёт, пока запрос уложится в предел частоты."""
+        wait = self.reserve()
+        if wait:
+            self._sleep(wait)
+
+    def pause(self, seconds):
+        """Метод останавливает выдачу токенов на seconds секунд."""
+        with self._lock:
+            self._paused_until = max(
+                self._paused_until, self._clock() + seconds
+            )
+
+
+class KeyedLimiter:
+    """Отдельное ведро токенов для каждого ключа, например чата."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key):
+        """Метод возвращает ведро ключа, создавая его при необходимости."""
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(self.rate, self.capacity)
+            return self._buckets[key]
+
+    def acquire(self, key):
+        """Метод ждёт, пока запрос по ключу уложится в предел частоты."""
+        self.bucket(key).acquire()
+
+
+class FloodWaits:
+    """Действующие паузы Telegram по ключам, например чатам.
+    Пауза обычно относится к одному чату. Если она действует сразу
+    для threshold разных чатов, предел считается общим для бота.
+    """
+
+    def __init__(self, threshold=3, clock=time.monotonic):
+        self.threshold = threshold
+        self._clock = clock
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        """Метод учитывает паузу ключа.
+        Возвращает True, если пауза похожа на общий предел бота.
+        """
+        with self._lock:
+            now = self._clock()
+            self._until = {
+                other: until for other, until in self._until.items()
+                if until > now
+            }
+            self._until[key] = now + seconds
+            return len(self._until) >= self.threshold
+
+
+def parse_retry_after(value, default=0.0):
+    """Функция переводит заголовок Retry-After в секунды ожидания.
+    Заголовок содержит число секунд или дату в формате HTTP.
+    """
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max(moment.timestamp() - time.time(), 0.0)
@@ -0,0 +1,126 @@
+"""Типизированные записи о домашних работах и их проверка по схеме."""
+
+import json
+from typing import NamedTuple, Optional
+
+from exceptions import FieldTypeError, MissingFieldError, UnknownStatusError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+RESPONSE_TYPE_ERROR = 'Неверный тип ответа API: {}. Ожидается словарь.'
+RESPONSE_FIELD_ERROR = 'В ответе API отсутствует поле: {}.'
+HOMEWORKS_TYPE_ERROR = 'Неверный тип поля homeworks: {}. Ожидается список.'
+HOMEWORK_TYPE_ERROR = 'Работа №{}: неверный тип {}. Ожидается словарь.'
+HOMEWORK_FIELD_ERROR = 'Работа №{}: отсутствует поле {}.'
+HOMEWORK_FIELD_TYPE_ERROR = 'Работа №{}: поле {} имеет тип {}, ожидается {}.'
+HOMEWORK_STATUS_ERROR = 'Работа №{}: недокументированный статус {!r}.'
+
+REQUIRED_FIELDS = (('homework_name', str), ('status', str))
+OPTIONAL_FIELDS = (
+    ('id', int),
+    ('date_updated', str),
+    ('lesson_name', str),
+    ('reviewer_comment', str),
+)
+
+
+class Homework(NamedTuple):
+    """Запись о домашней работе из ответа API.
+    Кортеж с именованными полями не хранит словарь атрибутов
+    и занимает меньше памяти, чем исходный dict.
+    """
+
+    homework_name: str
+    status: str
+    id: Optional[int] = None
+    date_updated: Optional[str] = None
+    lesson_name: Optional[str] = None
+    reviewer_comment: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data, statuses, index=0):
+        """Метод проверяет словарь работы и создаёт запись.
+        statuses - допустимые статусы работы. Готовая запись,
+        построенная в пуле процессов, возвращается как есть.
+        """
+        if isinstance(data, cls):
+            return data
+        if not isinstance(data, dict):
+            raise FieldTypeError(HOMEWORK_TYPE_ERROR.format(index, type(data)))
+        values = {}
+        for name, kind in REQUIRED_FIELDS:
+            if name not in data:
+                raise MissingFieldError(
+                    HOMEWORK_FIELD_ERROR.format(index, name)
+                )
+            values[name] = _typed(data[name], name, kind, index)
+        for name, kind in OPTIONAL_FIELDS:
+            value = data.get(name)
+            if value is not None:
+                values[name] = _typed(value, name, kind, index)
+        if values['status'] not in statuses:
+            raise UnknownStatusError(
+                HOMEWORK_STATUS_ERROR.format(index, values['status'])
+            )
+        return cls(**values)
+
+    @property
+    def key(self):
+        """Ключ работы в индексе доставленных статусов."""
+        return str(self.homework_name if self.id is None else self.id)
+
+
+def _typed(value, name, kind, index):
+    if isinstance(value, bool) or not isinstance(value, kind):
+        raise FieldTypeError(HOMEWORK_FIELD_TYPE_ERROR.format(
+            index, name, type(value).__name__, kind.__name__
+        ))
+    return value
+
+
+def homeworks_list(response):
+    """Функция проверяет ответ API и возвращает список работ без разбора."""
+    if not isinstance(response, dict):
+        raise FieldTypeError(RESPONSE_TYPE_ERROR.format(type(response)))
+    if 'homeworks' not in response:
+        raise MissingFieldError(RESPONSE_FIELD_ERROR.format('homeworks'))
+    homeworks = response['homeworks']
+    if not isinstance(homeworks, list):
+        raise FieldTypeError(HOMEWORKS_TYPE_ERROR.format(type(homeworks)))
+    return homeworks
+
+
+def parse_homeworks(response, statuses):
+    """Функция за один проход проверяет ответ API и строит записи."""
+    return [
+        Homework.from_dict(data, statuses, index)
+        for index, data in enumerate(homeworks_list(response))
+    ]
+
+
+def decode_json(response):
+    """Функция разбирает тело ответа, при наличии - через orjson."""
+    content = getattr(response, 'content', None)
+    if orjson is not None and isinstance(content, bytes):
+        return orjson.loads(content)
+    return response.json()
+
+
+def decode_payload(content, statuses):
+    """Функция разбирает тело ответа API и заранее строит записи работ.
+    Выполняется в процессе пула. Если ответ не проходит проверку,
+    работы остаются словарями, и ошибку с тем же текстом выбросит
+    обычный разбор в основном процессе.
+    """
+    if orjson is not None:
+        response = orjson.loads(content)
+    else:
+        response = json.loads(content)
+    try:
+        response['homeworks'] = parse_homeworks(response, statuses)
+    except (KeyError, TypeError, ValueError):
+        pass
+    return response
@@ -0,0 +1,193 @@
+"""Планирование опросов API для подписок."""
+
+import heapq
+import itertools
+import os
+import random
+from datetime import datetime, timedelta
+
+POLL_UPDATED = 'updated'  # В ответе были новые статусы
+POLL_EMPTY = 'empty'  # Новых статусов нет
+POLL_ERROR = 'error'  # Опрос завершился ошибкой
+POLL_UNDELIVERED = 'undelivered'  # Новые статусы не доставлены
+
+QUIET_HOURS_ERROR = 'Неверный формат тихих часов: {}. Ожидается ЧЧ-ЧЧ.'
+
+
+def parse_quiet_hours(value):
+    """Функция разбирает тихие часы вида "1-7" в пару часов.
+    Пустое значение отключает тихие часы.
+    """
+    if not value:
+        return None
+    try:
+        start, end = (int(hour) for hour in value.split('-'))
+    except ValueError:
+        raise ValueError(QUIET_HOURS_ERROR.format(value))
+    if not (0 <= start < 24 and 0 <= end < 24):
+        raise ValueError(QUIET_HOURS_ERROR.format(value))
+    return start, end
+
+
+class AdaptivePolicy:
+    """Политика интервала между опросами подписки.
+    Пока работа на проверке, опрос учащается. После ошибок и пустых
+    ответов интервал растёт экспоненциально до max_interval. Пауза,
+    запрошенная сервером через Retry-After, соблюдается. В тихие часы
+    опрос откладывается до их окончания.
+    """
+
+    def __init__(self, base_interval, reviewing_interval=None,
+                 max_interval=None, jitter=0.1, quiet_hours=None):
+        self.base_interval = base_interval
+        self.reviewing_interval = reviewing_interval or base_interval
+        self.max_interval = max_interval or base_interval
+        self.jitter = jitter
+        self.quiet_hours = quiet_hours
+
+    @classmethod
+    def from_env(cls, base_interval):
+        """Метод создаёт политику по переменным окружения."""
+        return cls(
+            base_interval,
+            reviewing_interval=float(
+                os.getenv('POLL_INTERVAL_REVIEWING', base_interval / 5)
+            ),
+            max_interval=float(
+                os.getenv('POLL_INTERVAL_MAX', base_interval * 6)
+            ),
+            jitter=float(os.getenv('POLL_JITTER', 0.1)),
+            quiet_hours=parse_quiet_hours(os.getenv('QUIET_HOURS')),
+        )
+
+    def next_delay(self, tenant, outcome, now=None):
+        """Метод возвращает паузу в секундах до следующего опроса.
+        Обновляет счётчики ошибок и пустых опросов подписки.
+        """
+        if outcome == POLL_ERROR:
+            tenant.failures += 1
+            delay = self._backoff(tenant.failures)
+        else:
+            tenant.failures = 0
+            if outcome == POLL_EMPTY:
+                tenant.idle_polls += 1
+            else:
+                tenant.idle_polls = 0
+            if tenant.is_reviewing():
+                delay = self.reviewing_interval
+            else:
+                delay = self._backoff(tenant.idle_polls)
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        delay = max(delay, tenant.retry_after)
+        tenant.retry_after = 0.0
+        return max(delay, self._until_quiet_end(now or datetime.now()))
+
+    def _backoff(self, attempts):
+        exponent = max(attempts - 1, 0)
+        return min(self.base_interval * 2 ** exponent, self.max_interval)
+
+    def _until_quiet_end(self, now):
+        if self.quiet_hours is None:
+            return 0
+        start, end = self.quiet_hours
+        hour = now.hour
+        if start <= end:
+            quiet = start <= hour < end
+        else:
+            quiet = hour >= start or hour < end
+        if not quiet:
+            return 0
+        wake = now.replace(hour=end, minute=0, second=0, microsecond=0)
+        if wake <= now:
+            wake += timedelta(days=1)
+        return (wake - now).total_seconds()
+
+
+class PollQueue:
+    """Очередь опросов на двоичной куче по времени срабатывания.
+    Добавление и перенос подписки стоят O(log n): прежняя запись
+    помечается удалённой и отбрасывается при извлечении.
+    """
+
+    _REMOVED = object()
+
+    def __init__(self):
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        """Число подписок в очереди."""
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Проверка наличия подписки в очереди."""
+        return key in self._entries
+
+    def add(self, key, due):
+        """Метод ставит или переносит опрос подписки на время due."""
+        self.remove(key)
+        entry = [due, next(self._counter), key]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, key):
+        """Метод снимает подписку с очереди, если она там есть."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry[2] = self._REMOVED
+
+    def stagger(self, keys, period, start):
+        """Метод равномерно распределяет первые опросы по периоду.
+        Так подписки не обращаются к API одновременно.
+        """
+        keys = list(keys)
+        step = period / len(keys) if keys else 0
+        for number, key in enumerate(keys):
+            self.add(key, start + number * step)
+
+    def next_due(self):
+        """Метод возвращает ближайшее время опроса или None."""
+        while self._heap and self._heap[0][2] is self._REMOVED:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Метод извлекает подписки, чей опрос наступил к моменту now.
+        Возвращает пары (ключ, назначенное время).
+        """
+        due = []
+        while True:
+            when = self.next_due()
+            if when is None or when > now:
+                return due
+            _, _, key = heapq.heappop(self._heap)
+            del self._entries[key]
+            due.append((key, when))
+
+
+class LagStats:
+    """Статистика опоздания опросов относительно назначенного времени."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, lag):
+        """Метод учитывает опоздание одного опроса в секундах."""
+        lag = max(lag, 0.0)
+        self.count += 1
+        self.total += lag
+        self.max = max(self.max, lag)
+        self.last = lag
+
+    def as_dict(self):
+        """Метод возвращает сводку опозданий."""
+        return dict(
+            count=self.count,
+            mean=self.total / self.count if self.count else 0.0,
+            max=self.max,
+            last=self.last,
+        )
@@ -0,0 +1,165 @@
+"""Разделение подписок между процессами-обработчиками."""
+
+import bisect
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+def _hash(value):
+    return int(hashlib.sha256(value.encode()).hexdigest()[:16], 16)
+
+
+class HashRing:
+    """Кольцо согласованного хеширования.
+    Каждый узел занимает replicas точек кольца, ключ принадлежит узлу
+    ближайшей следующей точки. При появлении или уходе узла меняют
+    владельца только ключи его точек.
+    """
+
+    def __init__(self, nodes, replicas=64):
+        self.nodes = sorted(set(nodes))
+        self._ring = sorted(
+            (_hash(f'{node}#{index}'), node)
+            for node in self.nodes
+            for index in range(replicas)
+        )
+        self._hashes = [point for point, _ in self._ring]
+
+    def owner(self, key):
+        """Метод возвращает узел-владелец ключа или None без узлов."""
+        if not self._ring:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+class SqliteLeases:
+    """Аренды ключей и пульс обработчиков в общей базе SQLite.
+    Аренда ключа принадлежит одному обработчику до истечения срока,
+    продлить её может только он. Таблицы живут рядом с состоянием
+    подписок в том же файле базы.
+    """
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=30, check_same_thread=False
+        )
+        with self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS workers ('
+                'worker TEXT PRIMARY KEY, '
+                'expires_at REAL NOT NULL)'
+            )
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS leases ('
+                'key TEXT PRIMARY KEY, '
+                'owner TEXT NOT NULL, '
+                'expires_at REAL NOT NULL)'
+            )
+
+    def heartbeat(self, worker, ttl):
+        """Метод отмечает обработчик живым на ttl секунд."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO workers (worker, expires_at) '
+                'VALUES (?, ?)', (worker, self._clock() + ttl)
+            )
+
+    def live_workers(self):
+        """Метод возвращает обработчики с непросроченным пульсом."""
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT worker FROM workers WHERE expires_at > ?',
+                (self._clock(),)
+            ).fetchall()
+        return [worker for worker, in rows]
+
+    def acquire(self, key, worker, ttl):
+        """Метод берёт или продлевает аренду ключа на ttl секунд.
+        Возвращает False, если ключ арендован другим обработчиком.
+        """
+        now = self._clock()
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                'INSERT INTO leases (key, owner, expires_at) '
+                'VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET '
+                'owner = excluded.owner, expires_at = excluded.expires_at '
+                'WHERE leases.owner = excluded.owner '
+                'OR leases.expires_at <= ?',
+                (key, worker, now + ttl, now)
+            )
+            return cursor.rowcount == 1
+
+    def release(self, key, worker):
+        """Метод отдаёт аренду ключа, если она принадлежит worker."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'DELETE FROM leases WHERE key = ? AND owner = ?',
+                (key, worker)
+            )
+
+    def leave(self, worker):
+        """Метод снимает обработчик и все его аренды."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'DELETE FROM workers WHERE worker = ?', (worker,)
+            )
+            self._connection.execute(
+                'DELETE FROM leases WHERE owner = ?', (worker,)
+            )
+
+    def close(self):
+        """Метод закрывает соединение с базой."""
+        with self._lock:
+            self._connection.close()
+
+
+class Shard:
+    """Доля подписок одного обработчика.
+    Ключ опрашивает обработчик, которому он принадлежит по кольцу
+    живых обработчиков и который держит его аренду. Аренда не даёт
+    двум обработчикам опрашивать ключ, пока их кольца расходятся.
+    """
+
+    def __init__(self, leases, worker, lease_ttl=60.0, replicas=64):
+        self.leases = leases
+        self.worker = worker
+        self.lease_ttl = lease_ttl
+        self.replicas = replicas
+        self.ring = HashRing([worker], replicas)
+
+    @property
+    def refresh_interval(self):
+        """Период пульса и пересборки кольца."""
+        return self.lease_ttl / 3
+
+    def refresh(self):
+        """Метод отправляет пульс и пересобирает кольцо обработчиков."""
+        self.leases.heartbeat(self.worker, self.lease_ttl)
+        self.ring = HashRing(
+            set(self.leases.live_workers()) | {self.worker}, self.replicas
+        )
+
+    def claim(self, key):
+        """Метод проверяет право опросить ключ и продлевает его аренду.
+        Чужой по кольцу ключ обработчик отпускает.
+        """
+        if self.ring.owner(key) != self.worker:
+            self.leases.release(key, self.worker)
+            return False
+        return self.leases.acquire(key, self.worker, self.lease_ttl)
+
+    def release(self, key):
+        """Метод отпускает аренду ключа, снятого с опроса."""
+        self.leases.release(key, self.worker)
+
+    def leave(self):
+        """Метод снимает обработчик, его ключи переходят к остальным."""
+        self.leases.leave(self.worker)
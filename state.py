@@ -0,0 +1,203 @@
+"""Хранилища состояния опроса подписок между перезапусками."""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+
+STATE_FLUSH_ERROR_LOG = 'Состояние не записано в {}, повтор через {} с: {}'
+STATE_STORE_FORMAT_ERROR = (
+    'Неподдерживаемое хранилище состояния: {}. '
+    'Ожидается файл .json, .db, .sqlite или .sqlite3'
+)
+
+
+class StateStore:
+    """Базовое хранилище: состояние подписки по ключу.
+    Состояние - словарь с полями current_date, statuses и last_error.
+    """
+
+    def get(self, key):
+        """Метод возвращает сохранённое состояние или None."""
+        raise NotImplementedError
+
+    def put(self, key, state):
+        """Метод сохраняет состояние подписки."""
+        raise NotImplementedError
+
+    def close(self):
+        """Метод освобождает ресурсы хранилища."""
+
+
+class MemoryStateStore(StateStore):
+    """Хранилище в памяти процесса, состояние теряется при выходе."""
+
+    def __init__(self):
+        self._states = {}
+
+    def get(self, key):
+        """Метод возвращает сохранённое состояние или None."""
+        return self._states.get(key)
+
+    def put(self, key, state):
+        """Метод сохраняет состояние подписки."""
+        self._states[key] = state
+
+
+class JsonStateStore(StateStore):
+    """Хранилище в JSON-файле с атомарной записью.
+    Файл перезаписывается целиком через временный файл и os.replace,
+    поэтому при сбое на диске остаётся прежняя или новая версия.
+    При flush_interval > 0 изменения копятся в памяти и пишутся
+    не чаще раза в flush_interval секунд и при закрытии, иначе
+    файл перезаписывается на каждый put.
+    """
+
+    def __init__(self, path, flush_interval=0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._states = {}
+        self._dirty = False
+        self._closed = threading.Event()
+        self._flusher = None
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self._states = json.load(file)
+        if flush_interval:
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name='state-flush',
+                daemon=True,
+            )
+            self._flusher.start()
+
+    def get(self, key):
+        """Метод возвращает сохранённое состояние или None."""
+        with self._lock:
+            return self._states.get(key)
+
+    def put(self, key, state):
+        """Метод сохраняет состояние подписки."""
+        with self._lock:
+            self._states[key] = state
+            self._dirty = True
+        if not self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Метод записывает накопленные изменения в файл."""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                states = dict(self._states)
+                self._dirty = False
+            try:
+                self._dump(states)
+            except BaseException:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def close(self):
+        """Метод останавливает фоновую запись и сохраняет изменения."""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as error:
+                logging.error(STATE_FLUSH_ERROR_LOG.format(
+                    self.path, self.flush_interval, error
+                ))
+
+    def _dump(self, states):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=directory, prefix='.state-', suffix='.tmp'
+        )
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump(states, file, ensure_ascii=False)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+class SqliteStateStore(StateStore):
+    """Хранилище в базе SQLite, каждая запись - отдельная транзакция."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS tenant_state ('
+                'key TEXT PRIMARY KEY, '
+                'last_date INTEGER NOT NULL, '
+                'statuses TEXT NOT NULL, '
+                'last_error TEXT NOT NULL)'
+            )
+
+    def get(self, key):
+        """Метод возвращает сохранённое состояние или None."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT last_date, statuses, last_error '
+                'FROM tenant_state WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        last_date, statuses, last_error = row
+        return dict(
+            current_date=last_date,
+            statuses=json.loads(statuses),
+            last_error=last_error,
+        )
+
+    def put(self, key, state):
+        """Метод сохраняет состояние подписки."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO tenant_state '
+                '(key, last_date, statuses, last_error) '
+                'VALUES (?, ?, ?, ?)',
+                (
+                    key,
+                    state['current_date'],
+                    json.dumps(state['statuses'], ensure_ascii=False),
+                    state['last_error'],
+                )
+            )
+
+    def close(self):
+        """Метод закрывает соединение с базой."""
+        with self._lock:
+            self._connection.close()
+
+
+def open_store(path, flush_interval=0):
+    """Функция выбирает хранилище по расширению файла.
+    Пустой путь означает хранение состояния только в памяти.
+    flush_interval - период записи изменений в JSON-файл.
+    """
+    if not path:
+        return MemoryStateStore()
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        return JsonStateStore(path, flush_interval)
+    if extension in ('.db', '.sqlite', '.sqlite3'):
+        return SqliteStateStore(path)
+    raise ValueError(STATE_STORE_FORMAT_ERROR.format(path))
@@ -0,0 +1,127 @@
+"""Потоковый разбор ответа API с длинной историей работ."""
+
+import codecs
+import json
+
+from exceptions import FieldTypeError, MissingFieldError
+from records import HOMEWORKS_TYPE_ERROR, RESPONSE_FIELD_ERROR
+
+STREAM_OBJECT_ERROR = 'Ответ API должен быть объектом JSON, получено: {!r}'
+STREAM_SYNTAX_ERROR = 'Ожидался символ {!r} в позиции {}, получено: {!r}'
+STREAM_END_ERROR = 'Ответ API оборвался до конца JSON'
+HOMEWORKS_FIELD = 'homeworks'
+WHITESPACE = ' \t\n\r'
+COMPACT_THRESHOLD = 64 * 1024
+# Разобранное начало буфера отбрасывается, чтобы память не росла с историей
+
+
+class HomeworkStream:
+    """Итератор работ из ответа API, читаемого по частям.
+    chunks - итерируемые байтовые фрагменты тела ответа. Работы из
+    массива homeworks выдаются по одной, не дожидаясь конца ответа.
+    Прочие поля верхнего уровня (current_date, code, error) доступны
+    в fields после окончания итерации.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self.fields = {}
+        self.has_homeworks = False
+
+    def _read(self):
+        if self._eof:
+            return False
+        if self._pos > COMPACT_THRESHOLD:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            self._buffer += self._decoder.decode(b'', final=True)
+            return True
+        self._buffer += self._decoder.decode(chunk)
+        return True
+
+    def _peek(self):
+        while True:
+            while (self._pos < len(self._buffer)
+                    and self._buffer[self._pos] in WHITESPACE):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                raise json.JSONDecodeError(
+                    STREAM_END_ERROR, self._buffer, self._pos
+                )
+
+    def _expect(self, *symbols):
+        symbol = self._peek()
+        if symbol not in symbols:
+            raise json.JSONDecodeError(
+                STREAM_SYNTAX_ERROR.format(symbols, self._pos, symbol),
+                self._buffer, self._pos
+            )
+        self._pos += 1
+        return symbol
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            if end == len(self._buffer) and not self._eof:
+                # Число на границе фрагмента могло оборваться
+                self._read()
+                continue
+            self._pos = end
+            return value
+
+    def __iter__(self):
+        """Метод выдаёт словари работ по мере чтения ответа."""
+        if self._peek() != '{':
+            raise FieldTypeError(STREAM_OBJECT_ERROR.format(self._peek()))
+        self._pos += 1
+        if self._peek() == '}':
+            self._pos += 1
+        else:
+            yield from self._members()
+        if not self.has_homeworks:
+            raise MissingFieldError(
+                RESPONSE_FIELD_ERROR.format(HOMEWORKS_FIELD)
+            )
+
+    def _members(self):
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == HOMEWORKS_FIELD and self._peek() == '[':
+                self._pos += 1
+                self.has_homeworks = True
+                yield from self._items()
+            else:
+                self.fields[key] = self._value()
+                if key == HOMEWORKS_FIELD:
+                    raise FieldTypeError(
+                        HOMEWORKS_TYPE_ERROR.format(type(self.fields[key]))
+                    )
+            if self._expect(',', '}') == '}':
+                return
+
+    def _items(self):
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',', ']') == ']':
+                return
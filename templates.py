@@ -0,0 +1,128 @@
+"""Шаблоны сообщений о статусе работ на нескольких языках."""
+
+import functools
+import html
+import re
+from string import Formatter
+
+PLAIN = None
+HTML = 'HTML'
+MARKDOWN = 'MarkdownV2'
+PARSE_MODES = (PLAIN, HTML, MARKDOWN)
+
+MARKDOWN_SPECIAL = re.compile(r'([_*\[\]()~`>#+\-=|{}.!\\])')
+LOCALE_ERROR = 'Неизвестный язык сообщений: {}'
+PARSE_MODE_ERROR = 'Неизвестный режим разметки Telegram: {}'
+STATUS_ERROR = 'Нет текста вердикта для статуса {!r} на языке {}'
+VERDICTS_ERROR = 'Тексты вердиктов должны быть строками: {!r}'
+
+LOCALES = {
+    'en': {
+        'message': 'Review status of "{name}" has changed. {verdict}',
+        'verdicts': {
+            'approved': 'The work is reviewed: the reviewer liked it. Hooray!',
+            'reviewing': 'The work is being reviewed.',
+            'rejected': 'The work is reviewed: the reviewer has remarks.',
+        },
+    },
+}
+
+
+def escape(text, parse_mode):
+    """Функция экранирует текст для режима разметки Telegram."""
+    if parse_mode == HTML:
+        return html.escape(text, quote=False)
+    if parse_mode == MARKDOWN:
+        return MARKDOWN_SPECIAL.sub(r'\\\1', text)
+    return text
+
+
+def emphasize(text, parse_mode):
+    """Функция выделяет уже экранированный текст жирным."""
+    if parse_mode == HTML:
+        return f'<b>{text}</b>'
+    if parse_mode == MARKDOWN:
+        return f'*{text}*'
+    return text
+
+
+class CompiledTemplate:
+    """Шаблон, разобранный один раз для языка и режима разметки.
+    Постоянные части уже экранированы, при выводе подставляются
+    только название работы и вердикт.
+    """
+
+    __slots__ = ('parts', 'verdicts', 'parse_mode')
+
+    def __init__(self, message, verdicts, parse_mode):
+        self.parse_mode = parse_mode
+        self.parts = []
+        for literal, field, _, _ in Formatter().parse(message):
+            if literal:
+                self.parts.append(escape(literal, parse_mode))
+            if field is not None:
+                self.parts.append(field)
+        self.parts = tuple(self.parts)
+        self.verdicts = {
+            status: escape(text, parse_mode)
+            for status, text in verdicts.items()
+        }
+
+    def render(self, name, verdict):
+        """Метод собирает сообщение из готовых частей."""
+        values = {
+            'name': emphasize(escape(name, self.parse_mode), self.parse_mode),
+            'verdict': verdict,
+        }
+        return ''.join(
+            values[part] if part in values else part for part in self.parts
+        )
+
+
+class TemplateSet:
+    """Набор шаблонов всех языков и режимов разметки.
+    Шаблоны компилируются при создании, готовые сообщения для
+    (название, статус, язык, разметка, свои вердикты) хранятся в LRU.
+    """
+
+    def __init__(self, locales, default_locale, cache_size=4096):
+        self.default_locale = default_locale
+        self._compiled = {
+            (locale, parse_mode): CompiledTemplate(
+                texts['message'], texts['verdicts'], parse_mode
+            )
+            for locale, texts in locales.items()
+            for parse_mode in PARSE_MODES
+        }
+        self.render = functools.lru_cache(maxsize=cache_size)(self._render)
+
+    def validate(self, locale=None, parse_mode=PLAIN, verdicts=()):
+        """Метод проверяет настройки сообщений подписки.
+        Неизвестный язык, режим разметки или нестроковые тексты
+        вердиктов вызывают ValueError.
+        """
+        if parse_mode not in PARSE_MODES:
+            raise ValueError(PARSE_MODE_ERROR.format(parse_mode))
+        locale = locale or self.default_locale
+        if (locale, parse_mode) not in self._compiled:
+            raise ValueError(LOCALE_ERROR.format(locale))
+        for status, text in verdicts:
+            if not isinstance(status, str) or not isinstance(text, str):
+                raise ValueError(VERDICTS_ERROR.format({status: text}))
+
+    def _render(self, name, status, locale=None, parse_mode=PLAIN,
+                verdicts=()):
+        locale = locale or self.default_locale
+        if parse_mode not in PARSE_MODES:
+            raise ValueError(PARSE_MODE_ERROR.format(parse_mode))
+        template = self._compiled.get((locale, parse_mode))
+        if template is None:
+            raise ValueError(LOCALE_ERROR.format(locale))
+        custom = dict(verdicts)
+        if status in custom:
+            verdict = escape(custom[status], parse_mode)
+        elif status in template.verdicts:
+            verdict = template.verdicts[status]
+        else:
+            raise ValueError(STATUS_ERROR.format(status, locale))
+        return template.render(name, verdict)
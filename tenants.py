@@ -0,0 +1,176 @@
+"""Подписки бота: пары токена Практикума и чата Телеграма."""
+
+import csv
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+
+TOKEN_FIELD = 'PRACTICUM_TOKEN'
+CHAT_FIELD = 'TELEGRAM_CHAT_ID'
+LOCALE_FIELD = 'LOCALE'
+PARSE_MODE_FIELD = 'PARSE_MODE'
+VERDICTS_FIELD = 'VERDICTS'
+# Необязательные поля: язык, разметка Telegram и свои тексты вердиктов
+CHAT_SEPARATORS = re.compile(r'[\s,;]+')
+# Разделители нескольких чатов в одном поле TELEGRAM_CHAT_ID
+
+SUBSCRIPTION_FIELD_ERROR = (
+    'В подписке {} отсутствует обязательное поле: {}'
+)
+SUBSCRIPTION_OPTIONS_ERROR = 'Подписка {} отклонена: {}'
+SUBSCRIPTIONS_FORMAT_ERROR = (
+    'Неподдерживаемый формат файла подписок: {}. Ожидается .csv или .json'
+)
+
+
+@dataclass
+class Tenant:
+    """Подписка и состояние её опроса.
+    timestamp и last_message заменяют локальные переменные
+    однопользовательского цикла main(), statuses хранит последний
+    доставленный статус каждой работы. locale, parse_mode и verdicts
+    (пары статус - текст) задают вид сообщений подписки. Счётчики
+    failures, idle_polls и запрошенная сервером пауза retry_after
+    нужны планировщику опросов и не сохраняются.
+    """
+
+    practicum_token: str
+    chat_id: str
+    timestamp: int = 0
+    last_message: str = ''
+    statuses: dict = field(default_factory=dict)
+    locale: str = None
+    parse_mode: str = None
+    verdicts: tuple = ()
+    failures: int = field(default=0, compare=False)
+    idle_polls: int = field(default=0, compare=False)
+    retry_after: float = field(default=0.0, compare=False)
+
+    def __repr__(self):
+        """Токен не попадает в логи целиком."""
+        return f'Tenant(chat_id={self.chat_id!r})'
+
+    @property
+    def token_key(self):
+        """Отпечаток токена подписки."""
+        return token_key(self.practicum_token)
+
+    @property
+    def key(self):
+        """Ключ подписки в хранилище состояния без открытого токена."""
+        return f'{self.token_key}:{self.chat_id}'
+
+    def is_reviewing(self):
+        """Метод проверяет, есть ли у подписки работа на проверке."""
+        return any(
+            status == 'reviewing' for status, _ in self.statuses.values()
+        )
+
+    def to_state(self):
+        """Метод возвращает состояние подписки для хранилища."""
+        return dict(
+            current_date=self.timestamp,
+            statuses=dict(self.statuses),
+            last_error=self.last_message,
+        )
+
+    def apply_state(self, state):
+        """Метод восстанавливает состояние подписки из хранилища."""
+        self.timestamp = state['current_date']
+        self.statuses = dict(state['statuses'])
+        self.last_message = state['last_error']
+
+    def adopt(self, previous):
+        """Метод переносит состояние прежней записи той же подписки.
+        Вместе с сохраняемым состоянием переносятся счётчики
+        планировщика, настройки остаются из новой записи.
+        """
+        self.apply_state(previous.to_state())
+        self.failures = previous.failures
+        self.idle_polls = previous.idle_polls
+        self.retry_after = previous.retry_after
+
+
+def token_key(practicum_token):
+    """Функция возвращает отпечаток токена для ключей и журналов."""
+    return hashlib.sha256(practicum_token.encode()).hexdigest()[:16]
+
+
+def split_chat_ids(value):
+    """Функция разбирает один или несколько чатов поля подписки.
+    value - строка с чатами через запятую, точку с запятой или пробел,
+    число или список чатов.
+    """
+    if isinstance(value, (list, tuple)):
+        return [str(chat_id) for chat_id in value]
+    return [
+        chat_id for chat_id in CHAT_SEPARATORS.split(str(value).strip())
+        if chat_id
+    ]
+
+
+def group_by_token(tenants):
+    """Функция строит индекс от отпечатка токена к подпискам его чатов.
+    Порядок подписок и групп сохраняется.
+    """
+    groups = {}
+    for tenant in tenants:
+        groups.setdefault(tenant.token_key, []).append(tenant)
+    return groups
+
+
+def _read_rows(path):
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8', newline='') as file:
+        if extension == '.csv':
+            return list(csv.DictReader(file))
+        if extension == '.json':
+            return json.load(file)
+    raise ValueError(SUBSCRIPTIONS_FORMAT_ERROR.format(path))
+
+
+def load_tenants(path, templates=None):
+    """Функция загружает таблицу подписок из CSV- или JSON-файла.
+    Каждая строка содержит поля PRACTICUM_TOKEN и TELEGRAM_CHAT_ID.
+    В TELEGRAM_CHAT_ID можно перечислить несколько чатов, в том числе
+    групповых: для каждого создаётся своя подписка на тот же токен.
+    Повторы пары токена и чата пропускаются. Если передан набор
+    шаблонов templates, строка с неизвестным языком, разметкой или
+    неверными вердиктами отклоняется с ValueError.
+    """
+    tenants = {}
+    for number, row in enumerate(_read_rows(path), start=1):
+        for name in (TOKEN_FIELD, CHAT_FIELD):
+            if not row.get(name):
+                raise KeyError(SUBSCRIPTION_FIELD_ERROR.format(number, name))
+        options = _message_options(row, number, templates)
+        for chat_id in split_chat_ids(row[CHAT_FIELD]):
+            tenant = Tenant(
+                practicum_token=row[TOKEN_FIELD], chat_id=chat_id, **options
+            )
+            tenants.setdefault(tenant.key, tenant)
+    return list(tenants.values())
+
+
+def _message_options(row, number, templates):
+    try:
+        options = dict(
+            locale=row.get(LOCALE_FIELD) or None,
+            parse_mode=row.get(PARSE_MODE_FIELD) or None,
+            verdicts=_verdicts(row.get(VERDICTS_FIELD)),
+        )
+        if templates is not None:
+            templates.validate(**options)
+    except (AttributeError, ValueError) as error:
+        raise ValueError(SUBSCRIPTION_OPTIONS_ERROR.format(number, error))
+    return options
+
+
+def _verdicts(value):
+    if not value:
+        return ()
+    if isinstance(value, str):
+        value = json.loads(value)
+    return tuple(sorted(value.items()))
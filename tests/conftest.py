@@ -1,9 +1,78 @@
 import sys
 from os.path import abspath, dirname
 
+import pytest
+import requests
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
 pytest_plugins = [
     'tests.fixtures.fixture_data'
 ]
+
+
+@pytest.fixture(autouse=True)
+def plain_requests_transport(monkeypatch):
+    """Запросы идут через requests.get, который подменяют тесты."""
+    import transport
+
+    monkeypatch.setattr(transport, 'get_session', lambda: requests)
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiters(monkeypatch):
+    """Каждый тест начинает с полными вёдрами токенов."""
+    import homework
+    from ratelimit import FloodWaits, KeyedLimiter, TokenBucket
+
+    monkeypatch.setattr(
+        homework, 'PRACTICUM_LIMITER', TokenBucket(homework.PRACTICUM_RATE)
+    )
+    monkeypatch.setattr(
+        homework, 'TELEGRAM_LIMITER', TokenBucket(homework.TELEGRAM_RATE)
+    )
+    monkeypatch.setattr(
+        homework, 'CHAT_LIMITER', KeyedLimiter(homework.TELEGRAM_CHAT_RATE)
+    )
+    monkeypatch.setattr(
+        homework, 'FLOOD_WAITS', FloodWaits(homework.TELEGRAM_FLOOD_CHATS)
+    )
+
+
+@pytest.fixture(autouse=True)
+def empty_api_cache(monkeypatch):
+    """Ответы API не переходят из теста в тест через кэш."""
+    import homework
+    from cache import ResponseCache
+
+    monkeypatch.setattr(
+        homework, 'API_CACHE',
+        ResponseCache(homework.API_CACHE_TTL, homework.API_CACHE_SIZE)
+    )
+
+
+@pytest.fixture(autouse=True)
+def closed_circuit_breakers(monkeypatch):
+    """Отказы API в одном тесте не размыкают выключатели другого."""
+    import homework
+    from breaker import CircuitBreaker
+
+    for name in ('PRACTICUM_BREAKER', 'TELEGRAM_BREAKER'):
+        breaker = getattr(homework, name)
+        monkeypatch.setattr(homework, name, CircuitBreaker(
+            breaker.name, homework.BREAKER_FAILURE_RATE,
+            homework.BREAKER_WINDOW, homework.BREAKER_MIN_CALLS,
+            homework.BREAKER_RESET_TIMEOUT
+        ))
+
+
+@pytest.fixture(autouse=True)
+def empty_error_aggregator(monkeypatch):
+    """Ошибки одного теста не подавляют сообщения в другом."""
+    import homework
+    from digest import ErrorAggregator
+
+    monkeypatch.setattr(
+        homework, 'ERRORS', ErrorAggregator(homework.ERROR_WINDOW)
+    )
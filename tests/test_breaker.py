@@ -0,0 +1,91 @@
+import pytest
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+
+    def test_opens_on_failure_rate_and_recovers(self):
+        from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+        from exceptions import CircuitOpen, RateLimited
+
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            'api', failure_rate=0.5, window=4, min_calls=4,
+            reset_timeout=10, clock=clock
+        )
+        for failed in (False, True, False):
+            breaker.allow()
+            breaker.failure() if failed else breaker.success()
+        assert breaker.state == CLOSED
+        breaker.allow()
+        breaker.failure()
+        assert breaker.state == OPEN
+        clock.now = 4
+        with pytest.raises(CircuitOpen) as raised:
+            breaker.allow()
+        assert isinstance(raised.value, RateLimited)
+        assert raised.value.retry_after == pytest.approx(6)
+        clock.now = 10
+        assert breaker.state == HALF_OPEN
+        breaker.allow()
+        with pytest.raises(CircuitOpen):
+            breaker.allow()
+        breaker.failure()
+        assert breaker.state == OPEN
+        clock.now = 20
+        breaker.allow()
+        breaker.success()
+        assert breaker.state == CLOSED
+        assert breaker.rejected == 2
+
+    def test_outage_stops_api_requests(self, monkeypatch):
+        import requests
+
+        import homework
+        from exceptions import CircuitOpen
+
+        calls = []
+
+        def get(*args, **kwargs):
+            calls.append(kwargs)
+            raise requests.exceptions.ConnectionError('down')
+
+        monkeypatch.setattr(requests, 'get', get)
+        for _ in range(homework.BREAKER_MIN_CALLS):
+            with pytest.raises(ConnectionError):
+                homework.get_api_answer(0)
+        with pytest.raises(CircuitOpen):
+            homework.get_api_answer(0)
+        assert len(calls) == homework.BREAKER_MIN_CALLS
+
+    def test_chat_errors_do_not_open_telegram_breaker(self):
+        import telegram
+
+        import homework
+        from breaker import CLOSED, OPEN
+
+        class Bot:
+            def __init__(self, error):
+                self.error = error
+
+            def send_message(self, chat_id, text):
+                raise self.error
+
+        calls = homework.BREAKER_MIN_CALLS
+        for chat_id in range(calls):
+            homework.send_to_chat(
+                Bot(telegram.error.BadRequest('x')), chat_id, 'm'
+            )
+        assert homework.TELEGRAM_BREAKER.state == CLOSED
+        for chat_id in range(calls, 2 * calls):
+            homework.send_to_chat(Bot(telegram.error.TimedOut()), chat_id, 'm')
+        assert homework.TELEGRAM_BREAKER.state == OPEN
+        assert not homework.send_to_chat(Bot(None), 2 * calls, 'm')
@@ -0,0 +1,94 @@
+from http import HTTPStatus
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache:
+
+    def test_ttl_and_lru(self):
+        from cache import ResponseCache
+
+        clock = FakeClock()
+        cache = ResponseCache(ttl=10, maxsize=2, clock=clock)
+        cache.store(('a', 0), {'homeworks': []})
+        cache.store(('b', 0), {'homeworks': []})
+        assert cache.get_fresh(('a', 0)) is not None
+        cache.store(('c', 0), {'homeworks': []})
+        assert cache.get_fresh(('b', 0)) is None
+        clock.now = 11
+        assert cache.get_fresh(('a', 0)) is None
+        assert cache.stats() == dict(
+            hits=1, misses=2, revalidated=0, size=2
+        )
+
+    def test_one_entry_per_token(self):
+        from cache import ResponseCache
+
+        cache = ResponseCache(ttl=10, maxsize=10, clock=FakeClock())
+        cache.store(('a', 0), {'homeworks': [{}] * 100}, etag='"v0"')
+        cache.store(('a', 100), {'homeworks': []}, etag='"v1"')
+        assert cache.get_fresh(('a', 0)) is None
+        assert cache.validators(('a', 0)) == {}
+        assert cache.validators(('a', 100)) == {'If-None-Match': '"v1"'}
+        assert cache.stats()['size'] == 1
+
+    def test_conditional_request_reuses_body(self, monkeypatch):
+        import requests
+
+        import homework
+
+        body = {'homeworks': [], 'current_date': 1000198000}
+        requests_seen = []
+
+        class Response:
+
+            def __init__(self, status_code):
+                self.status_code = status_code
+                self.headers = {'ETag': '"v1"'}
+
+            def json(self):
+                return body
+
+        def get(url, headers, params, **kwargs):
+            requests_seen.append(headers)
+            if headers.get('If-None-Match') == '"v1"':
+                return Response(HTTPStatus.NOT_MODIFIED)
+            return Response(HTTPStatus.OK)
+
+        monkeypatch.setattr(requests, 'get', get)
+        monkeypatch.setattr(homework.API_CACHE, 'ttl', 0)
+        assert homework.get_api_answer(0) == body
+        assert homework.get_api_answer(0) == body
+        assert 'If-None-Match' not in requests_seen[0]
+        assert requests_seen[1]['If-None-Match'] == '"v1"'
+        assert homework.API_CACHE.revalidated == 1
+
+    def test_duplicate_poll_served_locally(self, monkeypatch):
+        import requests
+
+        import homework
+
+        calls = []
+
+        class Response:
+            status_code = HTTPStatus.OK
+
+            def json(self):
+                return {'homeworks': [], 'current_date': 1}
+
+        def get(**kwargs):
+            calls.append(kwargs)
+            return Response()
+
+        monkeypatch.setattr(requests, 'get', get)
+        homework.get_api_answer(5)
+        homework.get_api_answer(5)
+        assert len(calls) == 1
+        assert homework.API_CACHE.hits == 1
@@ -0,0 +1,67 @@
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestErrorAggregator:
+
+    def test_fingerprint_ignores_volatile_parts(self):
+        from digest import fingerprint
+
+        first = ConnectionError(
+            "Ответ сервера = 502. Входящие параметры: https://a/?x=1, "
+            "{'Authorization': 'OAuth t1'}, {'from_date': 100}."
+        )
+        second = ConnectionError(
+            "Ответ сервера = 503. Входящие параметры: https://a/?x=2, "
+            "{'Authorization': 'OAuth t2'}, {'from_date': 200}."
+        )
+        assert fingerprint(first) == fingerprint(second)
+        assert fingerprint(first) != fingerprint(ValueError(str(first)))
+
+    def test_repeats_go_to_digest_after_window(self):
+        from digest import ErrorAggregator
+
+        clock = FakeClock()
+        errors = ErrorAggregator(window=3600, clock=clock)
+        assert errors.record('1', ConnectionError('timeout 1'))
+        assert errors.record('1', ValueError('bad'))
+        assert errors.record('2', ConnectionError('timeout 1'))
+        for number in range(36):
+            assert not errors.record('1', ConnectionError(f'timeout {number}'))
+            assert not errors.record('1', ValueError('bad'))
+        clock.now = 1800
+        assert errors.digest() == {}
+        clock.now = 3600
+        digests = errors.digest()
+        assert list(digests) == ['1']
+        assert 'ConnectionError ×37: timeout 1' in digests['1']
+        assert 'ValueError ×37: bad' in digests['1']
+        assert errors.record('1', ConnectionError('timeout 99'))
+
+    def test_alternating_errors_are_sent_once(self, monkeypatch):
+        import asyncio
+
+        import homework
+        from tenants import Tenant
+
+        sent = []
+        errors = iter([ConnectionError('down 1'), ValueError('bad'),
+                       ConnectionError('down 2'), ValueError('bad')])
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append(text)
+
+        def answer(token, timestamp):
+            raise next(errors)
+
+        monkeypatch.setattr(homework, 'get_tenant_answer', answer)
+        tenant = Tenant('token', '1')
+        for _ in range(4):
+            asyncio.run(homework.poll_tenant_async(Bot(), tenant))
+        assert len(sent) == 2
@@ -0,0 +1,42 @@
+import pytest
+
+
+@pytest.fixture
+def stand(monkeypatch):
+    import homework
+    from benchmarks.fake_api import FakeServer, FakeWorld
+
+    server = FakeServer(FakeWorld(churn=1.0, homeworks_per_token=1))
+    server.start()
+    monkeypatch.setattr(homework, 'ENDPOINT', server.endpoint)
+    yield server
+    server.stop()
+
+
+class TestFakeApi:
+
+    def test_poll_and_notify_through_stand(self, stand):
+        import asyncio
+
+        import homework
+        import transport
+        from tenants import Tenant
+
+        bot = transport.make_bot('123456:TEST', base_url=stand.bot_url)
+        tenant = Tenant('token', '42')
+        outcome = asyncio.run(homework.poll_tenant_async(bot, tenant))
+        assert outcome == 'updated'
+        stats = stand.world.stats()
+        assert stats['polls'] == 1
+        assert stats['messages'] == 1
+        assert stats['notifications'] == 1
+        assert stats['latency_p50'] >= 0
+
+    def test_stand_answers_429_with_retry_after(self, stand):
+        import homework
+        from exceptions import RateLimited
+
+        stand.world.throttle_rate = 1.0
+        with pytest.raises(RateLimited) as error:
+            homework.get_tenant_answer('token', 0)
+        assert error.value.retry_after == stand.world.retry_after
@@ -0,0 +1,80 @@
+import json
+import logging
+
+
+class TestLogConfig:
+
+    def test_queue_logging_to_rotating_json_file(self, tmp_path):
+        from log_config import configure_logging
+
+        path = tmp_path / 'bot.log'
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        listener = configure_logging(
+            str(path), level='INFO', max_bytes=200, backup_count=1,
+            json_lines=True
+        )
+        try:
+            logging.debug('скрыто')
+            for number in range(5):
+                logging.info('Сообщение отправлено: %s', number)
+        finally:
+            listener.stop()
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
+        lines = path.read_text(encoding='utf-8').splitlines()
+        records = [json.loads(line) for line in lines]
+        assert records[-1]['message'] == 'Сообщение отправлено: 4'
+        assert records[-1]['level'] == 'INFO'
+        assert all('скрыто' not in line for line in lines)
+        assert (tmp_path / 'bot.log.1').exists()
+
+    def test_full_queue_drops_records(self):
+        import queue
+
+        from log_config import DroppingQueueHandler
+
+        handler = DroppingQueueHandler(queue.Queue(1))
+        record = logging.makeLogRecord({'msg': 'запись'})
+        handler.handle(record)
+        handler.handle(record)
+        assert handler.dropped == 1
+
+    def test_full_queue_keeps_warnings(self):
+        import queue
+        import threading
+
+        from log_config import DroppingQueueHandler
+
+        log_queue = queue.Queue(1)
+        handler = DroppingQueueHandler(log_queue)
+        handler.handle(logging.makeLogRecord({'msg': 'запись'}))
+        error = logging.makeLogRecord(
+            {'msg': 'ошибка', 'levelno': logging.ERROR}
+        )
+        thread = threading.Thread(target=handler.handle, args=(error,))
+        thread.start()
+        assert log_queue.get(timeout=5).msg == 'запись'
+        thread.join(5)
+        assert log_queue.get(timeout=5).msg == 'ошибка'
+        assert handler.dropped == 0
+
+    def test_json_record_keeps_exception(self, tmp_path):
+        from log_config import configure_logging
+
+        path = tmp_path / 'bot.log'
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        listener = configure_logging(str(path), json_lines=True)
+        try:
+            try:
+                raise ValueError('сбой')
+            except ValueError:
+                logging.exception('Ошибка %s', 1)
+        finally:
+            listener.stop()
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
+        record = json.loads(path.read_text(encoding='utf-8'))
+        assert record['message'] == 'Ошибка 1'
+        assert 'ValueError: сбой' in record['exception']
@@ -0,0 +1,87 @@
+from urllib.request import urlopen
+
+import pytest
+
+
+class TestMetrics:
+
+    def test_render_counter_and_histogram(self):
+        from metrics import Counter, Histogram, Registry
+
+        registry = Registry()
+        counter = Counter('calls_total', 'Вызовы', ['function'], registry)
+        histogram = Histogram(
+            'duration_seconds', 'Длительность', buckets=(0.1, 1),
+            registry=registry
+        )
+        counter.inc('parse_status')
+        counter.inc('parse_status')
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        text = registry.render()
+        assert '# TYPE calls_total counter' in text
+        assert 'calls_total{function="parse_status"} 2' in text
+        assert 'duration_seconds_bucket{le="0.1"} 1' in text
+        assert 'duration_seconds_bucket{le="+Inf"} 2' in text
+        assert 'duration_seconds_count 2' in text
+
+    def test_instrumented_function_counts_errors(self):
+        import homework
+        from metrics import CALL_DURATION, CALL_ERRORS
+
+        calls = CALL_DURATION.count('parse_status')
+        errors = CALL_ERRORS.value('parse_status', 'MissingFieldError')
+        with pytest.raises(KeyError):
+            homework.parse_status({'status': 'approved'})
+        assert CALL_DURATION.count('parse_status') == calls + 1
+        assert CALL_ERRORS.value('parse_status', 'MissingFieldError') == errors + 1
+
+    def test_polling_path_is_instrumented(self, monkeypatch):
+        import homework
+        from metrics import CALL_DURATION
+        from tenants import Tenant
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                pass
+
+        monkeypatch.setattr(
+            homework, 'get_tenant_answer',
+            lambda token, timestamp: {'homeworks': [
+                {'homework_name': 'hw', 'status': 'approved'}
+            ], 'current_date': 1}
+        )
+        checks = CALL_DURATION.count('check_response')
+        renders = CALL_DURATION.count('parse_status')
+        homework.poll_tenant(Bot(), Tenant('token', '1'))
+        assert CALL_DURATION.count('check_response') == checks + 1
+        assert CALL_DURATION.count('parse_status') == renders + 1
+
+    def test_metrics_endpoint(self):
+        from metrics import Gauge, Registry, start_http_server
+
+        registry = Registry()
+        Gauge('queue_depth', 'Очередь', registry=registry).set(3)
+        server = start_http_server(0, registry=registry)
+        try:
+            port = server.server_address[1]
+            with urlopen(f'http://127.0.0.1:{port}/metrics') as response:
+                text = response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'queue_depth 3' in text
+
+    def test_cache_counters_are_exported(self):
+        import homework
+        from metrics import REGISTRY
+        from outbox import Outbox
+
+        homework.bind_gauges(Outbox(lambda *args, **kwargs: True))
+        homework.API_CACHE.store(('token', 0), {'homeworks': []})
+        homework.API_CACHE.get_fresh(('token', 0))
+        homework.API_CACHE.get_fresh(('other', 0))
+        text = REGISTRY.render()
+        assert 'homework_api_cache_requests{result="hits"} 1' in text
+        assert 'homework_api_cache_requests{result="misses"} 1' in text
+        assert 'homework_api_cache_entries 1' in text
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+class Response:
+
+    def __init__(self, payload):
+        self.status_code = 200
+        self.headers = {}
+        self.content = json.dumps(payload).encode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+@pytest.fixture(scope='module')
+def pool():
+    from offload import BatchExecutor
+
+    pool = BatchExecutor(1, batch_size=4, max_delay=0.01)
+    yield pool
+    pool.shutdown()
+
+
+class TestBatchExecutor:
+
+    def test_batch_results_and_errors(self, pool):
+        from exceptions import FieldTypeError
+        from records import Homework, decode_payload
+
+        bodies = [
+            json.dumps({'homeworks': [
+                {'id': number, 'homework_name': 'hw', 'status': 'approved'}
+            ]}).encode() for number in range(5)
+        ]
+        futures = [
+            pool.submit(decode_payload, body, STATUSES) for body in bodies
+        ]
+        broken = pool.submit(decode_payload, b'{"homeworks": [1]}', STATUSES)
+        invalid = pool.submit(decode_payload, b'{', STATUSES)
+        assert [
+            future.result(10)['homeworks'][0].id for future in futures
+        ] == list(range(5))
+        assert isinstance(futures[0].result()['homeworks'][0], Homework)
+        with pytest.raises(FieldTypeError):
+            Homework.from_dict(broken.result(10)['homeworks'][0], STATUSES)
+        with pytest.raises(ValueError):
+            invalid.result(10)
+
+    def test_broken_pool_fails_batch_and_restarts(self):
+        import os
+        from concurrent.futures.process import BrokenProcessPool
+
+        from offload import BatchExecutor
+
+        pool = BatchExecutor(1, batch_size=1)
+        try:
+            with pytest.raises(BrokenProcessPool):
+                pool.submit(os._exit, 1).result(timeout=10)
+            assert pool.submit(abs, -1).result(timeout=10) == 1
+        finally:
+            pool.shutdown()
+
+    def test_api_answer_is_decoded_in_pool(self, pool, monkeypatch):
+        import requests
+
+        import homework
+        from records import Homework
+
+        payload = {'homeworks': [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'approved'}
+        ], 'current_date': 100}
+        monkeypatch.setattr(
+            requests, 'get', lambda *args, **kwargs: Response(payload)
+        )
+        monkeypatch.setattr(homework, 'CPU_POOL', pool)
+        monkeypatch.setattr(homework, 'CPU_POOL_MIN_BYTES', 0)
+        response = homework.get_api_answer(0)
+        assert response['homeworks'] == [Homework('hw1', 'approved', 1)]
+        assert homework.parse_response(response) == response['homeworks']
+        assert homework.parse_status(response['homeworks'][0]) == (
+            homework.parse_status(payload['homeworks'][0])
+        )
+
+    def test_broken_pool_falls_back_to_thread(self, monkeypatch):
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+
+        import homework
+
+        class BrokenPool:
+            def submit(self, function, *args):
+                future = Future()
+                future.set_exception(BrokenProcessPool('worker died'))
+                return future
+
+        monkeypatch.setattr(homework, 'CPU_POOL', BrokenPool())
+        monkeypatch.setattr(homework, 'CPU_POOL_MIN_BYTES', 0)
+        payload = {'homeworks': [], 'current_date': 100}
+        assert homework.decode_response(Response(payload)) == payload
@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+
+class TestOnce:
+
+    @pytest.fixture
+    def bot(self, monkeypatch, tmp_path):
+        import homework
+        import transport
+
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append((chat_id, text))
+
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '123:bot')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '1')
+        monkeypatch.setattr(homework, 'SUBSCRIPTIONS_FILE', None)
+        monkeypatch.setattr(
+            homework, 'STATE_STORE', str(tmp_path / 'state.json')
+        )
+        monkeypatch.setattr(transport, 'make_bot', lambda token: Bot())
+        return sent
+
+    def test_once_resumes_from_saved_date(self, monkeypatch, bot):
+        import homework
+
+        requested = []
+
+        def answer(token, timestamp):
+            requested.append(timestamp)
+            return {'homeworks': [
+                {'homework_name': 'hw', 'status': 'approved'}
+            ], 'current_date': 100}
+
+        monkeypatch.setattr(homework, 'get_tenant_answer', answer)
+        assert homework.main(['--once']) == os.EX_OK
+        assert homework.main(['--once']) == os.EX_OK
+        assert requested == [0, 100]
+        assert len(bot) == 1
+
+    def test_once_reports_failed_poll(self, monkeypatch, bot):
+        import homework
+
+        def answer(token, timestamp):
+            raise ConnectionError('down')
+
+        monkeypatch.setattr(homework, 'get_tenant_answer', answer)
+        assert homework.main(['--once']) == os.EX_TEMPFAIL
+        monkeypatch.setattr(
+            homework, 'ERRORS', homework.ErrorAggregator(60)
+        )
+        assert homework.main(['--once']) == os.EX_TEMPFAIL
+        assert bot == [('1', homework.MAIN_EXCEPTION_MESSAGE.format('down'))]
+
+    def test_once_without_tokens(self, monkeypatch, bot):
+        import homework
+
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', None)
+        assert homework.main(['--once']) == os.EX_CONFIG
+
+    def test_once_reports_undelivered_messages(self, monkeypatch, bot):
+        import telegram
+
+        import homework
+        import transport
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                raise telegram.error.BadRequest('chat not found')
+
+        monkeypatch.setattr(transport, 'make_bot', lambda token: Bot())
+        monkeypatch.setattr(
+            homework, 'get_tenant_answer', lambda token, timestamp: {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 100,
+            }
+        )
+        assert homework.main(['--once']) == os.EX_TEMPFAIL
+
+    def test_once_polls_tokens_concurrently(self, monkeypatch, bot):
+        import threading
+
+        import homework
+        from tenants import Tenant
+
+        tokens = 8
+        barrier = threading.Barrier(tokens, timeout=5)
+
+        def answer(token, timestamp):
+            barrier.wait()
+            return {'homeworks': [], 'current_date': 100}
+
+        monkeypatch.setattr(homework, 'get_tenant_answer', answer)
+        monkeypatch.setattr(homework, 'POLL_CONCURRENCY', tokens)
+        monkeypatch.setattr(homework, 'load_subscriptions', lambda: [
+            Tenant(f'token{number}', str(number)) for number in range(tokens)
+        ])
+        assert homework.main(['--once']) == os.EX_OK
@@ -0,0 +1,103 @@
+import json
+import threading
+
+
+class TestOutbox:
+
+    def test_coalesces_messages_for_one_chat(self):
+        from outbox import Outbox
+
+        sent = []
+        gate = threading.Event()
+
+        def send(chat_id, text):
+            gate.wait(1)
+            sent.append((chat_id, text))
+            return True
+
+        outbox = Outbox(send, workers=1)
+        outbox.put(1, 'first')
+        outbox.start()
+        outbox.put(1, 'second')
+        outbox.put(1, 'third')
+        outbox.put(2, 'other')
+        gate.set()
+        assert outbox.join(2)
+        outbox.stop(1)
+        assert sent[0] == (1, 'first')
+        assert (1, 'second\n\nthird') in sent
+        assert (2, 'other') in sent
+
+    def test_put_blocks_when_full(self):
+        from outbox import Outbox
+
+        outbox = Outbox(lambda chat_id, text: True, maxsize=1)
+        assert outbox.put(1, 'first')
+        assert not outbox.put(1, 'second', timeout=0.05)
+        assert len(outbox) == 1
+
+    def test_dead_letter_after_retries(self, tmp_path):
+        from outbox import Outbox
+
+        attempts = []
+        path = tmp_path / 'dead.jsonl'
+
+        def send(chat_id, text):
+            attempts.append(text)
+            return False
+
+        outbox = Outbox(
+            send, attempts=3, backoff=0, dead_letter_path=str(path)
+        )
+        outbox.start()
+        outbox.put(7, 'lost')
+        outbox.stop(2)
+        assert attempts == ['lost'] * 3
+        record = json.loads(path.read_text(encoding='utf-8'))
+        assert record['chat_id'] == 7
+        assert record['text'] == 'lost'
+
+    def test_stop_timeout_spills_to_dead_letter(self, tmp_path):
+        from outbox import Outbox
+
+        gate = threading.Event()
+        path = tmp_path / 'dead.jsonl'
+
+        def send(chat_id, text):
+            gate.wait(1)
+            return True
+
+        outbox = Outbox(
+            send, workers=1, coalesce=False, dead_letter_path=str(path)
+        )
+        outbox.start()
+        for text in ('first', 'second', 'third'):
+            outbox.put(1, text)
+        outbox.stop(0.1)
+        gate.set()
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [record['text'] for record in records] == ['second', 'third']
+        assert len(outbox) == 0
+
+    def test_open_circuit_does_not_use_attempts(self, monkeypatch, tmp_path):
+        import outbox as outbox_module
+        from exceptions import CircuitOpen
+        from outbox import Outbox
+
+        monkeypatch.setattr(outbox_module, 'DEFER_MIN_WAIT', 0.01)
+        calls = []
+        path = tmp_path / 'dead.jsonl'
+
+        def send(chat_id, text):
+            calls.append(text)
+            if len(calls) <= 3:
+                raise CircuitOpen('open', 0)
+            return True
+
+        outbox = Outbox(send, attempts=1, dead_letter_path=str(path))
+        outbox.start()
+        outbox.put(1, 'text')
+        assert outbox.join(2)
+        outbox.stop(1)
+        assert calls == ['text'] * 4
+        assert not path.exists()
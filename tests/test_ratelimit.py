@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket:
+
+    def test_bucket_spaces_requests_after_burst(self):
+        from ratelimit import TokenBucket
+
+        clock = FakeClock()
+        bucket = TokenBucket(2, capacity=2, clock=clock, sleep=clock.sleep)
+        for _ in range(4):
+            bucket.acquire()
+        assert clock.now == pytest.approx(1.0)
+
+    def test_pause(self):
+        from ratelimit import TokenBucket
+
+        clock = FakeClock()
+        bucket = TokenBucket(10, clock=clock, sleep=clock.sleep)
+        bucket.pause(5)
+        bucket.acquire()
+        assert clock.now == pytest.approx(5.0)
+
+    @pytest.mark.parametrize('value, expected', [
+        ('7', 7.0), (None, 60.0), ('bad', 60.0), ('-3', 0.0)
+    ])
+    def test_parse_retry_after(self, value, expected):
+        from ratelimit import parse_retry_after
+
+        assert parse_retry_after(value, 60.0) == expected
+
+
+class TestRateLimitHandling:
+
+    def test_get_api_answer_raises_rate_limited(self, monkeypatch):
+        import requests
+
+        import homework
+        from exceptions import RateLimited
+
+        class Response:
+            status_code = HTTPStatus.TOO_MANY_REQUESTS
+            headers = {'Retry-After': '42'}
+
+        monkeypatch.setattr(requests, 'get', lambda **kwargs: Response())
+        with pytest.raises(RateLimited) as error:
+            homework.get_api_answer(0)
+        assert error.value.retry_after == 42.0
+
+    def test_send_message_waits_on_retry_after(self, monkeypatch):
+        import telegram
+
+        import homework
+        from ratelimit import KeyedLimiter
+
+        pauses = []
+        chat_pauses = []
+        monkeypatch.setattr(homework, 'CHAT_LIMITER', KeyedLimiter(100))
+        monkeypatch.setattr(homework.TELEGRAM_LIMITER, 'pause', pauses.append)
+        monkeypatch.setattr(
+            homework.CHAT_LIMITER.bucket(1), 'pause', chat_pauses.append
+        )
+
+        class Bot:
+            calls = 0
+
+            def send_message(self, chat_id, text):
+                Bot.calls += 1
+                if Bot.calls == 1:
+                    raise telegram.error.RetryAfter(3)
+
+        assert homework.send_to_chat(Bot(), 1, 'text')
+        assert chat_pauses == [3.0]
+        assert pauses == []
+        assert Bot.calls == 2
+
+    def test_flood_waits_in_many_chats_are_global(self):
+        from ratelimit import FloodWaits
+
+        now = [0.0]
+        waits = FloodWaits(threshold=3, clock=lambda: now[0])
+        assert not waits.record(1, 5)
+        assert not waits.record(1, 5)
+        assert not waits.record(2, 5)
+        now[0] = 6
+        assert not waits.record(3, 5)
+        assert not waits.record(4, 5)
+        assert waits.record(5, 5)
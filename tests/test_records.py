@@ -0,0 +1,53 @@
+import pytest
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+class TestRecords:
+
+    def test_parse_homeworks_builds_records(self):
+        from records import Homework, parse_homeworks
+
+        records = parse_homeworks({'homeworks': [{
+            'id': 123,
+            'status': 'approved',
+            'homework_name': 'hw123',
+            'reviewer_comment': 'Всё нравится',
+            'date_updated': '2020-02-13T14:40:57Z',
+            'lesson_name': 'Итоговый проект',
+        }], 'current_date': 1000198000}, STATUSES)
+        assert records == [Homework(
+            homework_name='hw123', status='approved', id=123,
+            date_updated='2020-02-13T14:40:57Z',
+            lesson_name='Итоговый проект', reviewer_comment='Всё нравится',
+        )]
+        assert records[0].key == '123'
+        assert not hasattr(records[0], '__dict__')
+
+    @pytest.mark.parametrize('homework, error, text', [
+        ({'status': 'approved'}, KeyError, 'Работа №0: отсутствует поле '
+                                           'homework_name.'),
+        ({'homework_name': 'hw', 'status': 'unknown'}, ValueError,
+         "Работа №0: недокументированный статус 'unknown'."),
+        ({'homework_name': 'hw', 'status': 'approved', 'id': '1'},
+         TypeError, 'Работа №0: поле id имеет тип str, ожидается int.'),
+        ('hw', TypeError, None),
+    ])
+    def test_precise_validation_errors(self, homework, error, text):
+        from exceptions import ResponseSchemaError
+        from records import parse_homeworks
+
+        with pytest.raises(error) as raised:
+            parse_homeworks({'homeworks': [homework]}, STATUSES)
+        assert isinstance(raised.value, ResponseSchemaError)
+        if text is not None:
+            assert str(raised.value) == text
+
+    @pytest.mark.parametrize('response, error', [
+        ([], TypeError), ({}, KeyError), ({'homeworks': {}}, TypeError)
+    ])
+    def test_response_shape_errors(self, response, error):
+        from records import parse_homeworks
+
+        with pytest.raises(error):
+            parse_homeworks(response, STATUSES)
@@ -0,0 +1,385 @@
+from datetime import datetime
+
+import pytest
+
+
+class TestAdaptivePolicy:
+
+    def make_policy(self, **kwargs):
+        from scheduler import AdaptivePolicy
+
+        options = dict(
+            reviewing_interval=60, max_interval=4800, jitter=0
+        )
+        options.update(kwargs)
+        return AdaptivePolicy(600, **options)
+
+    def test_backoff_on_errors_and_reset(self):
+        from scheduler import POLL_EMPTY, POLL_ERROR, POLL_UPDATED
+        from tenants import Tenant
+
+        policy = self.make_policy()
+        tenant = Tenant('token', '1')
+        now = datetime(2022, 1, 1, 12)
+        delays = [
+            policy.next_delay(tenant, POLL_ERROR, now) for _ in range(5)
+        ]
+        assert delays == [600, 1200, 2400, 4800, 4800]
+        assert policy.next_delay(tenant, POLL_UPDATED, now) == 600
+        assert policy.next_delay(tenant, POLL_EMPTY, now) == 600
+        assert policy.next_delay(tenant, POLL_EMPTY, now) == 1200
+
+    def test_reviewing_polls_faster(self):
+        from scheduler import POLL_EMPTY
+        from tenants import Tenant
+
+        policy = self.make_policy()
+        tenant = Tenant('token', '1', statuses={'1': ['reviewing', None]})
+        now = datetime(2022, 1, 1, 12)
+        assert policy.next_delay(tenant, POLL_EMPTY, now) == 60
+
+    @pytest.mark.parametrize('hour, expected', [
+        (23, 8 * 3600), (3, 4 * 3600), (12, 600)
+    ])
+    def test_quiet_hours(self, hour, expected):
+        from scheduler import POLL_UPDATED, parse_quiet_hours
+        from tenants import Tenant
+
+        policy = self.make_policy(quiet_hours=parse_quiet_hours('23-7'))
+        now = datetime(2022, 1, 1, hour)
+        delay = policy.next_delay(Tenant('token', '1'), POLL_UPDATED, now)
+        assert delay == expected
+
+    def test_jitter_bounds(self):
+        from scheduler import POLL_UPDATED
+        from tenants import Tenant
+
+        policy = self.make_policy(jitter=0.2)
+        delay = policy.next_delay(Tenant('token', '1'), POLL_UPDATED)
+        assert 480 <= delay <= 720
+
+
+class TestPollQueue:
+
+    def test_pop_due_in_order_with_reschedule(self):
+        from scheduler import PollQueue
+
+        queue = PollQueue()
+        queue.add('a', 30)
+        queue.add('b', 10)
+        queue.add('c', 20)
+        queue.add('b', 40)
+        queue.remove('c')
+        assert len(queue) == 2
+        assert queue.next_due() == 30
+        assert queue.pop_due(35) == [('a', 30)]
+        assert queue.pop_due(100) == [('b', 40)]
+        assert queue.next_due() is None
+
+    def test_stagger_spreads_polls_over_period(self):
+        from scheduler import PollQueue
+
+        queue = PollQueue()
+        queue.stagger(['a', 'b', 'c', 'd'], 600, start=1000)
+        assert [due for _, due in queue.pop_due(2000)] == [
+            1000, 1150, 1300, 1450
+        ]
+
+    def test_lag_stats(self):
+        from scheduler import LagStats
+
+        lag = LagStats()
+        for value in (0.5, 1.5, -1):
+            lag.observe(value)
+        assert lag.as_dict() == dict(count=3, mean=2 / 3, max=1.5, last=0.0)
+
+
+class TestPoller:
+
+    def test_poller_staggers_and_reschedules(self, monkeypatch):
+        import asyncio
+
+        import homework
+        from scheduler import AdaptivePolicy
+        from tenants import Tenant
+
+        polls = []
+
+        async def poll(bot, tenants, store=None):
+            polls.extend(tenant.chat_id for tenant in tenants)
+            return 'empty'
+
+        monkeypatch.setattr(homework, 'poll_tenants_async', poll)
+        monkeypatch.setattr(homework, 'RETRY_TIME', 0.2)
+        tenants = [Tenant(f'token{i}', str(i)) for i in range(4)]
+
+        async def run():
+            poller = homework.Poller(
+                None, tenants, policy=AdaptivePolicy(0.2, jitter=0)
+            )
+            try:
+                await asyncio.wait_for(poller.run(), 0.5)
+            except asyncio.TimeoutError:
+                pass
+            return poller
+
+        poller = asyncio.run(run())
+        assert polls[:4] == ['0', '1', '2', '3']
+        assert polls.count('0') >= 2
+        assert poller.lag.count == len(polls)
+
+    def test_reload_adds_and_removes_tokens(self, monkeypatch):
+        import asyncio
+
+        import homework
+        from scheduler import AdaptivePolicy
+        from state import MemoryStateStore
+        from tenants import Tenant
+
+        polls = []
+
+        async def poll(bot, tenants, store=None):
+            polls.extend(tenant.chat_id for tenant in tenants)
+            return 'empty'
+
+        monkeypatch.setattr(homework, 'poll_tenants_async', poll)
+        monkeypatch.setattr(homework, 'RETRY_TIME', 60)
+        store = MemoryStateStore()
+        store.put(Tenant('token2', '3').key, dict(
+            current_date=300, statuses={}, last_error=''
+        ))
+        subscriptions = [[Tenant('token0', '0'), Tenant('token1', '1')]]
+
+        async def run():
+            poller = homework.Poller(
+                None, subscriptions[0], store,
+                policy=AdaptivePolicy(60, jitter=0),
+                load=lambda: subscriptions[0],
+            )
+            poller.groups[Tenant('token1', '1').token_key][0].timestamp = 100
+            subscriptions[0] = [
+                Tenant('token1', '1'), Tenant('token1', '2'),
+                Tenant('token2', '3'),
+            ]
+            task = asyncio.create_task(poller.run())
+            await asyncio.sleep(0.05)
+            await poller.reload()
+            await asyncio.sleep(0.05)
+            poller.stop()
+            await task
+            return poller
+
+        poller = asyncio.run(run())
+        groups = {
+            key: {tenant.chat_id: tenant.timestamp for tenant in tenants}
+            for key, tenants in poller.groups.items()
+        }
+        assert list(groups.values()) == [{'1': 100, '2': 0}, {'3': 300}]
+        assert '3' in polls
+        assert len(poller.queue) == 2
+
+    def test_failed_poll_is_rescheduled(self, monkeypatch, caplog):
+        import asyncio
+        import sqlite3
+
+        import homework
+        from scheduler import AdaptivePolicy
+        from tenants import Tenant
+
+        polls = []
+
+        async def poll(bot, tenants, store=None):
+            polls.append(tenants)
+            if len(polls) == 1:
+                raise sqlite3.OperationalError('database is locked')
+            return 'empty'
+
+        monkeypatch.setattr(homework, 'poll_tenants_async', poll)
+        monkeypatch.setattr(homework, 'RETRY_TIME', 0)
+
+        async def run():
+            poller = homework.Poller(
+                None, [Tenant('token', '1')],
+                policy=AdaptivePolicy(0.01, jitter=0),
+            )
+            asyncio.get_running_loop().call_later(0.2, poller.stop)
+            await asyncio.wait_for(poller.run(), 1)
+
+        asyncio.run(run())
+        assert len(polls) > 2
+        assert 'database is locked' in caplog.text
+
+    def test_stop_waits_for_started_polls(self, monkeypatch):
+        import asyncio
+
+        import homework
+        from scheduler import AdaptivePolicy
+        from tenants import Tenant
+
+        finished = []
+
+        async def poll(bot, tenants, store=None):
+            await asyncio.sleep(0.1)
+            finished.extend(tenant.chat_id for tenant in tenants)
+            return 'empty'
+
+        monkeypatch.setattr(homework, 'poll_tenants_async', poll)
+        monkeypatch.setattr(homework, 'RETRY_TIME', 0)
+
+        async def run():
+            poller = homework.Poller(
+                None, [Tenant('token', '1')],
+                policy=AdaptivePolicy(60, jitter=0),
+            )
+            asyncio.get_running_loop().call_later(0.02, poller.stop)
+            await asyncio.wait_for(poller.run(), 1)
+            return poller
+
+        poller = asyncio.run(run())
+        assert finished == ['1']
+        assert not poller.queue.pop_due(float('inf'))
+
+    def test_polls_and_outbox_share_shutdown_deadline(self, monkeypatch):
+        import asyncio
+        import time
+
+        import homework
+        from tenants import Tenant
+
+        async def poll(bot, tenants, store=None):
+            await asyncio.sleep(10)
+
+        monkeypatch.setattr(homework, 'poll_tenants_async', poll)
+        monkeypatch.setattr(homework, 'RETRY_TIME', 0)
+        monkeypatch.setattr(homework, 'SHUTDOWN_TIMEOUT', 0.4)
+
+        async def run():
+            poller = homework.Poller(None, [Tenant('token', '1')])
+            asyncio.get_running_loop().call_later(0.02, poller.stop)
+            await asyncio.wait_for(poller.run(), 1)
+            return poller
+
+        poller = asyncio.run(run())
+        assert time.monotonic() - poller.stopped_at < 0.3
+        assert 0 < homework.shutdown_time_left(poller.stopped_at) <= 0.2
+        assert homework.shutdown_time_left(None) == 0.4
+
+    def test_blocked_threads_do_not_hold_shutdown(self, monkeypatch, tmp_path):
+        import asyncio
+        import json
+        import os
+        import signal
+        import threading
+        import time
+
+        import homework
+        from tenants import Tenant
+
+        telegram_down = threading.Event()
+        request_hung = threading.Event()
+
+        class Bot:
+            def send_message(self, chat_id, text, **kwargs):
+                telegram_down.wait(10)
+
+        async def poll(bot, tenants, store=None):
+            if tenants[0].practicum_token == 'hung':
+                await asyncio.get_running_loop().run_in_executor(
+                    None, request_hung.wait, 10
+                )
+            for number in range(3):
+                await homework.send_message_async(bot, '1', f'm{number}')
+            return 'empty'
+
+        dead_letters = tmp_path / 'dead.jsonl'
+        for name, value in (
+            ('poll_tenants_async', poll), ('RETRY_TIME', 60),
+            ('WEBHOOK_PORT', 0), ('METRICS_PORT', 0),
+            ('SHUTDOWN_TIMEOUT', 1), ('OUTBOX_SIZE', 1),
+            ('OUTBOX_WORKERS', 1), ('DEAD_LETTER_FILE', str(dead_letters)),
+        ):
+            monkeypatch.setattr(homework, name, value)
+        timer = threading.Timer(0.3, os.kill, (os.getpid(), signal.SIGTERM))
+        timer.start()
+        started = time.monotonic()
+        try:
+            homework.run_forever(
+                Bot(), [Tenant('token', '1'), Tenant('hung', '2')],
+                None, None,
+            )
+            elapsed = time.monotonic() - started
+        finally:
+            telegram_down.set()
+            request_hung.set()
+            timer.join()
+        assert elapsed < 0.3 + homework.SHUTDOWN_TIMEOUT + 0.3
+        records = [
+            json.loads(line) for line in dead_letters.read_text().splitlines()
+        ]
+        assert [record['text'] for record in records] == ['m1']
+
+    def test_sigterm_stops_polling_loop(self, monkeypatch):
+        import asyncio
+        import os
+        import signal
+
+        import homework
+        from tenants import Tenant
+
+        polls = []
+
+        async def poll(bot, tenants, store=None):
+            polls.append(tenants)
+            return 'empty'
+
+        monkeypatch.setattr(homework, 'poll_tenants_async', poll)
+        monkeypatch.setattr(homework, 'RETRY_TIME', 0)
+        monkeypatch.setattr(homework, 'WEBHOOK_PORT', 0)
+
+        async def run():
+            asyncio.get_running_loop().call_later(
+                0.05, os.kill, os.getpid(), signal.SIGTERM
+            )
+            await asyncio.wait_for(
+                homework.polling_loop(None, [Tenant('token', '1')]), 1
+            )
+
+        asyncio.run(run())
+        assert polls
+        assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
+
+    def test_subscriptions_file_change_reloads(self, monkeypatch, tmp_path):
+        import asyncio
+        import os
+
+        import homework
+        from scheduler import AdaptivePolicy
+        from tenants import load_tenants
+
+        async def poll(bot, tenants, store=None):
+            return 'empty'
+
+        path = tmp_path / 'tenants.csv'
+        path.write_text('PRACTICUM_TOKEN,TELEGRAM_CHAT_ID\ntoken0,0\n')
+        monkeypatch.setattr(homework, 'poll_tenants_async', poll)
+        monkeypatch.setattr(homework, 'SUBSCRIPTIONS_WATCH_INTERVAL', 0.02)
+
+        async def run():
+            poller = homework.Poller(
+                None, load_tenants(str(path)),
+                policy=AdaptivePolicy(60, jitter=0),
+                load=lambda: load_tenants(str(path)), watch=str(path),
+            )
+            task = asyncio.create_task(poller.run())
+            await asyncio.sleep(0.05)
+            path.write_text(
+                'PRACTICUM_TOKEN,TELEGRAM_CHAT_ID\ntoken0,0\ntoken1,1\n'
+            )
+            os.utime(path, ns=(0, 10 ** 18))
+            await asyncio.sleep(0.1)
+            poller.stop()
+            await task
+            return poller
+
+        poller = asyncio.run(run())
+        assert len(poller.groups) == 2
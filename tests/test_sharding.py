@@ -0,0 +1,120 @@
+import json
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+ROOT = dirname(dirname(abspath(__file__)))
+KEYS = [f'token-{number}' for number in range(200)]
+WORKER = '''
+import json, sys, time
+from sharding import Shard, SqliteLeases
+
+path, worker, workers = sys.argv[1], sys.argv[2], int(sys.argv[3])
+shard = Shard(SqliteLeases(path), worker, lease_ttl=30)
+deadline = time.monotonic() + 20
+while len(shard.ring.nodes) < workers and time.monotonic() < deadline:
+    shard.refresh()
+    time.sleep(0.05)
+keys = json.loads(sys.stdin.read())
+print(json.dumps([key for key in keys if shard.claim(key)]))
+'''
+
+
+class TestSharding:
+
+    def test_ring_moves_few_keys_on_scale_up(self):
+        from sharding import HashRing
+
+        before = HashRing(['w1', 'w2', 'w3'])
+        after = HashRing(['w1', 'w2', 'w3', 'w4'])
+        moved = [
+            key for key in KEYS if before.owner(key) != after.owner(key)
+        ]
+        assert all(after.owner(key) == 'w4' for key in moved)
+        assert 0 < len(moved) < len(KEYS) / 2
+
+    def test_lease_blocks_other_worker_until_expiry(self, tmp_path):
+        from sharding import SqliteLeases
+
+        now = [0.0]
+        leases = SqliteLeases(str(tmp_path / 'state.db'), clock=lambda: now[0])
+        assert leases.acquire('key', 'w1', 10)
+        assert not leases.acquire('key', 'w2', 10)
+        now[0] = 5
+        assert leases.acquire('key', 'w1', 10)
+        now[0] = 14
+        assert not leases.acquire('key', 'w2', 10)
+        now[0] = 15
+        assert leases.acquire('key', 'w2', 10)
+        leases.release('key', 'w1')
+        assert not leases.acquire('key', 'w1', 10)
+        leases.close()
+
+    def test_processes_split_keys_without_overlap(self, tmp_path):
+        from sharding import Shard, SqliteLeases
+
+        path = str(tmp_path / 'state.db')
+        workers = ['w1', 'w2', 'w3']
+        processes = [
+            subprocess.Popen(
+                [sys.executable, '-c', WORKER, path, worker, '3'],
+                cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                text=True,
+            )
+            for worker in workers
+        ]
+        owned = [
+            json.loads(process.communicate(json.dumps(KEYS), 30)[0])
+            for process in processes
+        ]
+        assert all(owned)
+        assert sorted(sum(owned, [])) == sorted(KEYS)
+
+        leases = SqliteLeases(path)
+        Shard(leases, 'w3').leave()
+        survivor = Shard(leases, 'w1', lease_ttl=30)
+        survivor.refresh()
+        assert survivor.ring.nodes == ['w1', 'w2']
+        taken = [key for key in KEYS if survivor.claim(key)]
+        assert set(owned[0]) < set(taken)
+        assert not set(taken) & set(owned[1])
+        leases.close()
+
+    def test_poller_polls_only_own_tokens(self, tmp_path, monkeypatch):
+        import asyncio
+
+        import homework
+        from scheduler import AdaptivePolicy
+        from sharding import Shard, SqliteLeases
+        from tenants import Tenant
+
+        polled = []
+
+        async def poll(bot, tenants, store=None):
+            polled.extend(tenant.practicum_token for tenant in tenants)
+            return 'empty'
+
+        monkeypatch.setattr(homework, 'poll_tenants_async', poll)
+        monkeypatch.setattr(homework, 'RETRY_TIME', 0.1)
+        leases = SqliteLeases(str(tmp_path / 'state.db'))
+        leases.heartbeat('w2', 30)
+        shard = Shard(leases, 'w1', lease_ttl=30)
+        tenants = [Tenant(key, '1') for key in KEYS[:20]]
+
+        async def run():
+            poller = homework.Poller(
+                None, tenants, policy=AdaptivePolicy(10, jitter=0),
+                shard=shard
+            )
+            try:
+                await asyncio.wait_for(poller.run(), 0.5)
+            except asyncio.TimeoutError:
+                pass
+
+        asyncio.run(run())
+        assert sorted(polled) == sorted(
+            tenant.practicum_token for tenant in tenants
+            if shard.ring.owner(tenant.token_key) == 'w1'
+        )
+        assert 0 < len(polled) < len(tenants)
+        leases.close()
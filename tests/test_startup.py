@@ -0,0 +1,17 @@
+class TestStartup:
+
+    def test_import_defers_heavy_modules(self):
+        from benchmarks.startup import DEFERRED, MODULE, loaded_modules
+
+        assert loaded_modules(MODULE, DEFERRED) == []
+
+    def test_lazy_module_loads_on_first_use(self):
+        import sys
+
+        from lazy import lazy_import
+
+        sys.modules.pop('wave', None)
+        wave = lazy_import('wave')
+        assert lazy_import('wave') is wave
+        assert wave.WAVE_FORMAT_PCM == 1
+        del sys.modules['wave']
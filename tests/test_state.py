@@ -0,0 +1,90 @@
+import pytest
+
+
+class TestStateStore:
+    STATE = {
+        'current_date': 1000198000,
+        'statuses': {'123': 'reviewing'},
+        'last_error': 'Сбой в работе программы: timeout',
+    }
+
+    @pytest.mark.parametrize('file_name', ['state.json', 'state.sqlite3'])
+    def test_state_survives_reopen(self, tmp_path, file_name):
+        from state import open_store
+
+        path = str(tmp_path / file_name)
+        store = open_store(path)
+        assert store.get('key') is None
+        store.put('key', self.STATE)
+        store.close()
+
+        store = open_store(path)
+        assert store.get('key') == self.STATE
+        store.close()
+
+    def test_json_store_leaves_no_temp_files(self, tmp_path):
+        from state import open_store
+
+        store = open_store(str(tmp_path / 'state.json'))
+        store.put('key', self.STATE)
+        assert [p.name for p in tmp_path.iterdir()] == ['state.json']
+
+    def test_json_store_batches_writes(self, tmp_path):
+        from state import open_store
+
+        path = tmp_path / 'state.json'
+        store = open_store(str(path), flush_interval=60)
+        for number in range(100):
+            store.put(str(number), self.STATE)
+        assert not path.exists()
+        store.close()
+
+        store = open_store(str(path))
+        assert store.get('99') == self.STATE
+        store.close()
+
+    def test_json_store_flusher_survives_write_error(self, tmp_path):
+        import time
+
+        from state import open_store
+
+        path = tmp_path / 'state.json'
+        store = open_store(str(path), flush_interval=0.01)
+        dump, failures = store._dump, []
+
+        def failing_dump(states):
+            if not failures:
+                failures.append(states)
+                raise OSError(28, 'No space left on device')
+            dump(states)
+
+        store._dump = failing_dump
+        store.put('key', self.STATE)
+        deadline = time.monotonic() + 5
+        while not path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert failures and store._flusher.is_alive()
+        store.close()
+        assert open_store(str(path)).get('key') == self.STATE
+
+    def test_poll_resumes_from_saved_date(self, monkeypatch, tmp_path):
+        import asyncio
+
+        import homework
+        from state import open_store
+        from tenants import Tenant
+
+        requested = []
+
+        def answer(token, timestamp):
+            requested.append(timestamp)
+            return {'homeworks': [], 'current_date': 1000198991}
+
+        monkeypatch.setattr(homework, 'get_tenant_answer', answer)
+        store = open_store(str(tmp_path / 'state.json'))
+        store.put(Tenant('token', '1').key, self.STATE)
+
+        tenant = Tenant('token', '1')
+        homework.restore_state([tenant], store)
+        asyncio.run(homework.poll_tenant_async(None, tenant, store))
+        assert requested == [self.STATE['current_date']]
@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+
+def chunked(data, size):
+    raw = json.dumps(data, ensure_ascii=False, indent=1).encode('utf-8')
+    return [raw[start:start + size] for start in range(0, len(raw), size)]
+
+
+class TestHomeworkStream:
+    RESPONSE = {
+        'current_date': 1000198991,
+        'homeworks': [
+            {'id': number, 'homework_name': f'работа{number}',
+             'status': 'approved'}
+            for number in range(100)
+        ],
+        'tail': [1, {'поле': 'значение'}],
+    }
+
+    @pytest.mark.parametrize('size', [1, 5, 64, 100000])
+    def test_stream_yields_every_homework(self, size):
+        from streaming import HomeworkStream
+
+        stream = HomeworkStream(chunked(self.RESPONSE, size))
+        assert list(stream) == self.RESPONSE['homeworks']
+        assert stream.fields == {
+            'current_date': 1000198991, 'tail': [1, {'поле': 'значение'}]
+        }
+
+    def test_stream_is_lazy(self):
+        from streaming import HomeworkStream
+
+        chunks = iter(chunked(self.RESPONSE, 16))
+        first = next(iter(HomeworkStream(chunks)))
+        assert first == self.RESPONSE['homeworks'][0]
+        assert next(chunks, None) is not None
+
+    @pytest.mark.parametrize('raw, error', [
+        (b'[]', TypeError),
+        (b'{"current_date": 1}', KeyError),
+        (b'{"homeworks": {}}', TypeError),
+        (b'{"homeworks": [{"id": 1}', ValueError),
+    ])
+    def test_stream_errors(self, raw, error):
+        from streaming import HomeworkStream
+
+        with pytest.raises(error):
+            list(HomeworkStream([raw]))
+
+    def test_poll_history_through_stand(self, monkeypatch):
+        import asyncio
+
+        import homework
+        import transport
+        from benchmarks.fake_api import FakeServer, FakeWorld
+        from tenants import Tenant
+
+        server = FakeServer(FakeWorld(churn=0, homeworks_per_token=3))
+        server.start()
+        try:
+            monkeypatch.setattr(homework, 'ENDPOINT', server.endpoint)
+            monkeypatch.setattr(homework, 'STREAM_HISTORY', True)
+            bot = transport.make_bot('123456:TEST', base_url=server.bot_url)
+            tenant = Tenant('token', '42')
+            outcome = asyncio.run(homework.poll_tenant_async(bot, tenant))
+        finally:
+            server.stop()
+        assert outcome == 'updated'
+        assert len(tenant.statuses) == 3
+        assert tenant.timestamp > 0
+        assert server.world.stats()['messages'] == 1
+
+    def test_poll_history_fans_out_to_chats(self, monkeypatch):
+        import asyncio
+
+        import homework
+        import transport
+        from benchmarks.fake_api import FakeServer, FakeWorld
+        from tenants import Tenant
+
+        server = FakeServer(FakeWorld(churn=0, homeworks_per_token=3))
+        server.start()
+        try:
+            monkeypatch.setattr(homework, 'ENDPOINT', server.endpoint)
+            monkeypatch.setattr(homework, 'STREAM_HISTORY', True)
+            monkeypatch.setattr(homework, 'get_tenant_answer', None)
+            bot = transport.make_bot('123456:TEST', base_url=server.bot_url)
+            tenants = [Tenant('token', '42'), Tenant('token', '43')]
+            outcome = asyncio.run(homework.poll_tenants_async(bot, tenants))
+        finally:
+            server.stop()
+        assert outcome == 'updated'
+        assert [len(tenant.statuses) for tenant in tenants] == [3, 3]
+        assert server.world.stats()['messages'] == 2
+
+    def test_poll_history_closes_response_on_error(self, monkeypatch):
+        import homework
+        from tenants import Tenant
+
+        closed = []
+
+        class Response:
+            def iter_content(self, size):
+                yield b'{"homeworks": [{"status": "approved"}]}'
+
+            def close(self):
+                closed.append(True)
+
+        monkeypatch.setattr(
+            homework, 'open_history_stream',
+            lambda token, timestamp: (Response(), {})
+        )
+        with pytest.raises(KeyError):
+            homework.poll_history(None, [Tenant('token', '1')])
+        assert closed == [True]
@@ -0,0 +1,87 @@
+import pytest
+
+
+class TestTemplates:
+
+    def test_default_locale_matches_legacy_message(self):
+        import homework
+
+        message = homework.status_message(homework.Homework(
+            'hw <1>', 'approved', 1, None, None, None
+        ))
+        assert message == homework.PARSE_STATUS_RETURN.format(
+            'hw <1>', homework.HOMEWORK_VERDICTS['approved']
+        )
+
+    @pytest.mark.parametrize('parse_mode, expected', [
+        (None, 'Review status of "a_b <c>" has changed. '
+               'The work is being reviewed.'),
+        ('HTML', 'Review status of "<b>a_b &lt;c&gt;</b>" has changed. '
+                 'The work is being reviewed.'),
+        ('MarkdownV2', 'Review status of "*a\\_b <c\\>*" has changed\\. '
+                       'The work is being reviewed\\.'),
+    ])
+    def test_escaping_per_parse_mode(self, parse_mode, expected):
+        from templates import LOCALES, TemplateSet
+
+        templates = TemplateSet(LOCALES, 'en')
+        assert templates.render(
+            'a_b <c>', 'reviewing', None, parse_mode
+        ) == expected
+
+    def test_custom_verdicts_and_errors(self):
+        from templates import LOCALES, TemplateSet
+
+        templates = TemplateSet(LOCALES, 'en')
+        verdicts = (('approved', 'Принято!'),)
+        assert templates.render('hw', 'approved', 'en', None, verdicts) == (
+            'Review status of "hw" has changed. Принято!'
+        )
+        with pytest.raises(ValueError):
+            templates.render('hw', 'approved', 'de')
+        with pytest.raises(ValueError):
+            templates.render('hw', 'approved', 'en', 'Markdown')
+        with pytest.raises(ValueError):
+            templates.render('hw', 'unknown', 'en')
+
+    def test_rendered_messages_are_cached(self):
+        from templates import LOCALES, TemplateSet
+
+        templates = TemplateSet(LOCALES, 'en', cache_size=2)
+        for _ in range(3):
+            templates.render('hw', 'approved')
+        info = templates.render.cache_info()
+        assert (info.hits, info.misses) == (2, 1)
+
+    def test_outbox_keeps_parse_modes_apart(self):
+        from outbox import Outbox
+
+        sent = []
+        outbox = Outbox(
+            lambda chat_id, text, **options: sent.append((text, options))
+            or True
+        )
+        outbox.put(1, 'a', 'HTML')
+        outbox.put(1, 'b', 'HTML')
+        outbox.put(1, 'c')
+        outbox.start()
+        outbox.stop(timeout=5)
+        assert sent == [('a\n\nb', {'parse_mode': 'HTML'}), ('c', {})]
+
+    def test_tenants_read_message_options(self, tmp_path):
+        from tenants import load_tenants
+
+        path = tmp_path / 'tenants.csv'
+        path.write_text(
+            'PRACTICUM_TOKEN,TELEGRAM_CHAT_ID,LOCALE,PARSE_MODE,VERDICTS\n'
+            't1,1,en,HTML,"{""approved"": ""Yes""}"\n'
+            't2,2,,,\n',
+            encoding='utf-8',
+        )
+        first, second = load_tenants(path)
+        assert (first.locale, first.parse_mode, first.verdicts) == (
+            'en', 'HTML', (('approved', 'Yes'),)
+        )
+        assert (second.locale, second.parse_mode, second.verdicts) == (
+            None, None, ()
+        )
@@ -0,0 +1,255 @@
+import json
+
+import pytest
+
+
+class TestTenants:
+
+    def test_load_tenants_csv(self, tmp_path):
+        from tenants import load_tenants
+
+        path = tmp_path / 'subscriptions.csv'
+        path.write_text(
+            'PRACTICUM_TOKEN,TELEGRAM_CHAT_ID\n'
+            'token1,111\n'
+            'token2,222\n',
+            encoding='utf-8'
+        )
+        tenants = load_tenants(str(path))
+        assert [t.chat_id for t in tenants] == ['111', '222']
+        assert tenants[0].practicum_token == 'token1'
+        assert tenants[0].timestamp == 0
+        assert tenants[0].last_message == ''
+
+    def test_load_tenants_json(self, tmp_path):
+        from tenants import load_tenants
+
+        path = tmp_path / 'subscriptions.json'
+        path.write_text(json.dumps([
+            {'PRACTICUM_TOKEN': 'token1', 'TELEGRAM_CHAT_ID': 111},
+        ]), encoding='utf-8')
+        tenants = load_tenants(str(path))
+        assert tenants[0].chat_id == '111'
+
+    def test_load_tenants_fans_out_chats(self, tmp_path):
+        from tenants import group_by_token, load_tenants
+
+        path = tmp_path / 'subscriptions.json'
+        path.write_text(json.dumps([
+            {'PRACTICUM_TOKEN': 'token1', 'TELEGRAM_CHAT_ID': '111, -100222'},
+            {'PRACTICUM_TOKEN': 'token1', 'TELEGRAM_CHAT_ID': [111, 333]},
+            {'PRACTICUM_TOKEN': 'token2', 'TELEGRAM_CHAT_ID': 444},
+        ]), encoding='utf-8')
+        tenants = load_tenants(str(path))
+        assert [t.chat_id for t in tenants] == [
+            '111', '-100222', '333', '444'
+        ]
+        groups = list(group_by_token(tenants).values())
+        assert [[t.chat_id for t in group] for group in groups] == [
+            ['111', '-100222', '333'], ['444']
+        ]
+
+    def test_load_tenants_missing_field(self, tmp_path):
+        from tenants import load_tenants
+
+        path = tmp_path / 'subscriptions.csv'
+        path.write_text('PRACTICUM_TOKEN,TELEGRAM_CHAT_ID\ntoken1,\n')
+        with pytest.raises(KeyError):
+            load_tenants(str(path))
+
+    @pytest.mark.parametrize('options, error', [
+        ('de,,', 'de'),
+        (',Markdown,', 'Markdown'),
+        (',,"[""approved""]"', 'items'),
+        (',,"{""approved"": 1}"', 'approved'),
+    ])
+    def test_load_tenants_rejects_message_options(
+        self, tmp_path, options, error
+    ):
+        import homework
+        from tenants import load_tenants
+
+        path = tmp_path / 'subscriptions.csv'
+        path.write_text(
+            'PRACTICUM_TOKEN,TELEGRAM_CHAT_ID,LOCALE,PARSE_MODE,VERDICTS\n'
+            'token1,1,en,HTML,\n'
+            f'token1,2,{options}\n',
+            encoding='utf-8',
+        )
+        with pytest.raises(ValueError, match=f'2 .*{error}'):
+            load_tenants(str(path), homework.TEMPLATES)
+
+    def test_poll_tenant_keeps_state_per_tenant(self, monkeypatch):
+        import homework
+        from tenants import Tenant
+
+        answers = {
+            'token1': {'homeworks': [
+                {'homework_name': 'hw1', 'status': 'approved'}
+            ], 'current_date': 100},
+            'token2': {'homeworks': [], 'current_date': 200},
+        }
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append((chat_id, text))
+
+        monkeypatch.setattr(
+            homework, 'get_tenant_answer',
+            lambda token, timestamp: answers[token]
+        )
+        first, second = Tenant('token1', '1'), Tenant('token2', '2')
+        for tenant in (first, second):
+            homework.poll_tenant(Bot(), tenant)
+        assert first.timestamp == 100
+        assert second.timestamp == 200
+        assert [chat_id for chat_id, _ in sent] == ['1']
+
+    def test_poll_all_async_limits_concurrency(self, monkeypatch):
+        import asyncio
+        import threading
+        import time
+
+        import homework
+        from tenants import Tenant
+
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def answer(token, timestamp):
+            with lock:
+                in_flight.append(token)
+                peak.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.remove(token)
+            return {'homeworks': [], 'current_date': 1}
+
+        monkeypatch.setattr(homework, 'get_tenant_answer', answer)
+        tenants = [Tenant(f'token{i}', str(i)) for i in range(6)]
+        started = time.monotonic()
+        asyncio.run(homework.poll_all_async(None, tenants, concurrency=3))
+        assert max(peak) <= 3
+        assert time.monotonic() - started < 0.05 * len(tenants)
+
+    def test_poll_tenant_sends_every_new_status_once(self, monkeypatch):
+        import homework
+        from tenants import Tenant
+
+        response = {'homeworks': [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+             'date_updated': '2020-02-13T14:40:57Z'},
+            {'id': 2, 'homework_name': 'hw2', 'status': 'rejected',
+             'date_updated': '2020-02-13T14:41:57Z'},
+        ], 'current_date': 100}
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append(text)
+
+        monkeypatch.setattr(
+            homework, 'get_tenant_answer', lambda token, timestamp: response
+        )
+        tenant = Tenant('token', '1', timestamp=50)
+        homework.poll_tenant(Bot(), tenant)
+        homework.poll_tenant(Bot(), tenant)
+        assert len(sent) == 1
+        assert '"hw1"' in sent[0] and '"hw2"' in sent[0]
+        assert tenant.timestamp == 100
+
+    def test_first_poll_announces_only_latest_status(self, monkeypatch):
+        import homework
+        from tenants import Tenant
+
+        response = {'homeworks': [
+            {'id': number, 'homework_name': f'hw{number}',
+             'status': 'approved'}
+            for number in range(200, 0, -1)
+        ], 'current_date': 100}
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append(text)
+
+        monkeypatch.setattr(
+            homework, 'get_tenant_answer', lambda token, timestamp: response
+        )
+        tenant = Tenant('token', '1')
+        homework.poll_tenant(Bot(), tenant)
+        homework.poll_tenant(Bot(), tenant)
+        assert sent == [homework.status_message(
+            homework.Homework('hw200', 'approved', 200)
+        )]
+        assert len(tenant.statuses) == 200
+
+    def test_poll_all_async_fans_out_one_request(self, monkeypatch):
+        import asyncio
+
+        import homework
+        from tenants import Tenant
+
+        requests = []
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append(chat_id)
+
+        def answer(token, timestamp):
+            requests.append((token, timestamp))
+            return {'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'}
+            ], 'current_date': 100}
+
+        monkeypatch.setattr(homework, 'get_tenant_answer', answer)
+        delivered = Tenant('token', '3', timestamp=50)
+        homework.remember_status(
+            homework.Homework('hw1', 'approved', 1, None, None, None),
+            delivered.statuses
+        )
+        tenants = [Tenant('token', '1'), Tenant('token', '-2'), delivered]
+        asyncio.run(homework.poll_all_async(Bot(), tenants))
+        assert requests == [('token', 0)]
+        assert sorted(sent) == ['-2', '1']
+        assert [tenant.timestamp for tenant in tenants] == [100, 100, 100]
+
+    def test_combine_messages_respects_length_limit(self):
+        import homework
+
+        updates = [({'id': i}, 'x' * 3000) for i in range(3)]
+        batches = list(homework.combine_messages(updates))
+        assert len(batches) == 3
+        assert all(
+            len(message) <= homework.MESSAGE_MAX_LENGTH
+            for _, message in batches
+        )
+
+    def test_poll_error_does_not_leak_token(self, monkeypatch):
+        import asyncio
+
+        import requests
+
+        import homework
+        from tenants import Tenant
+
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append((chat_id, text))
+
+        def get(**kwargs):
+            raise requests.exceptions.ConnectionError('refused')
+
+        monkeypatch.setattr(requests, 'get', get)
+        tenants = [Tenant('secret-token', 'student'),
+                   Tenant('secret-token', '-100mentors')]
+        asyncio.run(homework.poll_tenants_async(Bot(), tenants))
+        assert sorted(chat_id for chat_id, _ in sent) == [
+            '-100mentors', 'student'
+        ]
+        assert not any('secret-token' in text for _, text in sent)
@@ -0,0 +1,33 @@
+class TestTransport:
+
+    def test_shared_session_drops_cookies(self):
+        import threading
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+
+        import transport
+
+        received = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                received.append(self.headers.get('Cookie'))
+                self.send_response(200)
+                self.send_header('Set-Cookie', 'session=tenant1; Path=/')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/'
+        try:
+            session = transport.make_session()
+            session.get(url, timeout=1)
+            session.get(url, timeout=1)
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert received == [None, None]
+        assert not session.cookies
@@ -0,0 +1,193 @@
+import json
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+
+def post(port, body, token='token', secret=None, path='/webhook'):
+    headers = {'Authorization': f'OAuth {token}'} if token else {}
+    if secret:
+        headers['X-Webhook-Secret'] = secret
+    request = Request(
+        f'http://127.0.0.1:{port}{path}',
+        data=json.dumps(body).encode('utf-8'), headers=headers,
+        method='POST',
+    )
+    try:
+        with urlopen(request) as response:
+            return response.status
+    except HTTPError as error:
+        return error.code
+
+
+HOMEWORK = {
+    'id': 1, 'status': 'approved', 'homework_name': 'hw1',
+    'date_updated': '2020-02-13T14:40:57Z',
+}
+
+
+class TestWebhook:
+
+    @pytest.mark.parametrize('kwargs, status', [
+        (dict(body={'homeworks': []}), 202),
+        (dict(body={'homeworks': []}, path='/other'), 404),
+        (dict(body={'homeworks': []}, token=None), 401),
+        (dict(body={'homeworks': []}, secret='wrong'), 403),
+        (dict(body={'homeworks': []}, token='stranger'), 404),
+        (dict(body={'homeworks': {}}), 400),
+        (dict(body=[]), 400),
+    ])
+    def test_receiver_status_codes(self, kwargs, status):
+        from exceptions import UnknownSubscription
+        from records import parse_homeworks
+        from webhook import start_http_server
+
+        received = []
+
+        def receive(token, response):
+            if token != 'token':
+                raise UnknownSubscription(token)
+            received.append(parse_homeworks(response, ['approved']))
+
+        secret = 'secret' if 'secret' in kwargs else None
+        server = start_http_server(receive, 0, secret=secret)
+        try:
+            port = server.server_address[1]
+            assert post(port, **kwargs) == status
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert len(received) == (status == 202)
+
+    def test_pushed_status_is_delivered_once(self):
+        import asyncio
+
+        import homework
+        from tenants import Tenant
+        from webhook import start_http_server
+
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append((chat_id, text))
+
+        tenant = Tenant('token', '1')
+
+        async def run():
+            poller = homework.Poller(Bot(), [tenant])
+            server = start_http_server(poller.receive, 0)
+            port = server.server_address[1]
+            loop = asyncio.get_running_loop()
+            try:
+                for _ in range(2):
+                    status = await loop.run_in_executor(
+                        None, post, port, {'homeworks': [HOMEWORK]}
+                    )
+                    assert status == 202
+                    await asyncio.sleep(0.2)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        asyncio.run(run())
+        assert sent == [('1', homework.parse_status(HOMEWORK))]
+        assert tenant.timestamp == 0
+
+    def test_stop_closes_receiver_and_delivers_accepted(self, monkeypatch):
+        import asyncio
+        import time
+
+        import homework
+        from exceptions import ShuttingDown
+        from tenants import Tenant
+        from webhook import start_http_server
+
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                time.sleep(0.2)
+                sent.append((chat_id, text))
+
+        async def poll(bot, tenants, store=None):
+            return 'empty'
+
+        monkeypatch.setattr(homework, 'poll_tenants_async', poll)
+        monkeypatch.setattr(homework, 'RETRY_TIME', 0)
+
+        async def run():
+            poller = homework.Poller(Bot(), [Tenant('token', '1')])
+            poller.receiver = start_http_server(poller.receive, 0)
+            port = poller.receiver.server_address[1]
+            loop = asyncio.get_running_loop()
+            running = asyncio.ensure_future(poller.run())
+            status = await loop.run_in_executor(
+                None, post, port, {'homeworks': [HOMEWORK]}
+            )
+            assert status == 202
+            poller.stop()
+            await asyncio.wait_for(running, 5)
+            with pytest.raises(ShuttingDown):
+                poller.receive('token', {'homeworks': [HOMEWORK]})
+            with pytest.raises(OSError):
+                await loop.run_in_executor(
+                    None, post, port, {'homeworks': [HOMEWORK]}
+                )
+            return poller
+
+        poller = asyncio.run(run())
+        assert sent == [('1', homework.parse_status(HOMEWORK))]
+        assert poller.receiver is None
+
+    def test_receiver_rejects_events_while_stopping(self):
+        from exceptions import ShuttingDown
+        from webhook import start_http_server
+
+        def receive(token, response):
+            raise ShuttingDown()
+
+        server = start_http_server(receive, 0)
+        try:
+            assert post(server.server_address[1], {'homeworks': []}) == 503
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_event_without_date_is_not_repeated_by_poll(self, monkeypatch):
+        import asyncio
+
+        import requests
+
+        import homework
+        from tenants import Tenant
+
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append((chat_id, text))
+
+        class Response:
+            status_code = 200
+            headers = {}
+
+            def json(self):
+                return {'homeworks': [HOMEWORK], 'current_date': 100}
+
+        monkeypatch.setattr(
+            requests, 'get', lambda *args, **kwargs: Response()
+        )
+        tenant = Tenant('token', '1', timestamp=50)
+        event = dict(HOMEWORK)
+        del event['date_updated']
+
+        async def run():
+            await homework.ingest_tenant_async(
+                Bot(), tenant, homework.parse_response({'homeworks': [event]})
+            )
+            await homework.poll_tenants_async(Bot(), [tenant])
+
+        asyncio.run(run())
+        assert sent == [('1', homework.parse_status(HOMEWORK))]
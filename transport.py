@@ -0,0 +1,81 @@
+"""Общий пул HTTP-соединений для запросов к API Практикума и Телеграма."""
+
+import os
+import threading
+from http import cookiejar
+
+from lazy import lazy_import
+
+requests = lazy_import('requests')
+telegram = lazy_import('telegram')
+# Загружаются при первом запросе, а не при импорте бота
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 64))
+# Число keep-alive соединений с одним хостом
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+
+class BlockAll(cookiejar.CookiePolicy):
+    """Политика, не принимающая и не отправляющая cookies.
+    Сессия общая для всех токенов, cookie из ответа одной подписки
+    не должны уходить с запросами другой.
+    """
+
+    netscape = True
+    rfc2965 = hide_cookie2 = False
+
+    def set_ok(self, cookie, request):
+        """Cookie из ответа не сохраняются."""
+        return False
+
+    def return_ok(self, cookie, request):
+        """Cookie не отправляются с запросом."""
+        return False
+
+    domain_return_ok = path_return_ok = return_ok
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def make_session():
+    """Функция создаёт HTTP-сессию с пулом соединений без cookies."""
+    session = requests.Session()
+    session.cookies.set_policy(BlockAll())
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Функция возвращает общую HTTP-сессию с пулом соединений.
+    Сессия создаётся при первом обращении и переиспользует
+    TCP- и TLS-соединения между опросами.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = make_session()
+    return _session
+
+
+def make_bot(token, **kwargs):
+    """Функция создаёт бота с пулом соединений и таймаутами.
+    Размер пула и таймауты общие с сессией запросов к Практикуму.
+    """
+    from telegram.utils.request import Request
+
+    request = Request(
+        con_pool_size=HTTP_POOL_SIZE,
+        connect_timeout=HTTP_CONNECT_TIMEOUT,
+        read_timeout=HTTP_READ_TIMEOUT,
+    )
+    return telegram.Bot(token=token, request=request, **kwargs)
@@ -0,0 +1,87 @@
+"""Приём присылаемых событий о статусах работ."""
+
+import hmac
+import json
+import logging
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from exceptions import ShuttingDown, UnknownSubscription
+
+WEBHOOK_PATH = '/webhook'
+MAX_BODY_SIZE = 1024 * 1024
+AUTH_SCHEME = 'OAuth '
+SECRET_HEADER = 'X-Webhook-Secret'
+WEBHOOK_REJECTED_LOG = 'Событие отклонено: {}'
+RECEIVE_ERRORS = {
+    UnknownSubscription: HTTPStatus.NOT_FOUND,
+    ShuttingDown: HTTPStatus.SERVICE_UNAVAILABLE,
+}
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Обработчик событий: POST на WEBHOOK_PATH.
+    Тело события имеет вид ответа API, токен Практикума передаётся
+    в Authorization, как в запросах к API. receive(token, response)
+    проверяет событие и передаёт его на доставку.
+    """
+
+    receive = None
+    secret = None
+
+    def log_message(self, *args):
+        """Запросы приёмника не пишутся в журнал."""
+
+    def do_POST(self):
+        """Ответ на событие: 202 при приёме, иначе код ошибки."""
+        status = self._handle()
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _handle(self):
+        if self.path.split('?')[0] != WEBHOOK_PATH:
+            return HTTPStatus.NOT_FOUND
+        if self.secret and not hmac.compare_digest(
+            self.headers.get(SECRET_HEADER, '').encode('utf-8'),
+            self.secret.encode('utf-8'),
+        ):
+            return HTTPStatus.FORBIDDEN
+        authorization = self.headers.get('Authorization', '')
+        if not authorization.startswith(AUTH_SCHEME):
+            return HTTPStatus.UNAUTHORIZED
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST
+        if length > MAX_BODY_SIZE:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        try:
+            self.receive(
+                authorization[len(AUTH_SCHEME):],
+                json.loads(self.rfile.read(length)),
+            )
+        except tuple(RECEIVE_ERRORS) as error:
+            return RECEIVE_ERRORS[type(error)]
+        except (KeyError, TypeError, ValueError) as error:
+            logging.warning(WEBHOOK_REJECTED_LOG.format(error))
+            return HTTPStatus.BAD_REQUEST
+        return HTTPStatus.ACCEPTED
+
+
+def stop_http_server(server):
+    """Функция останавливает приём событий и закрывает сокет."""
+    server.shutdown()
+    server.server_close()
+
+
+def start_http_server(receive, port, host='127.0.0.1', secret=None):
+    """Функция запускает приёмник событий в фоновом потоке."""
+    handler = type('Handler', (WebhookHandler,), {
+        'receive': staticmethod(receive), 'secret': secret,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server